@@ -0,0 +1,74 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import config
+import database as db
+import repository
+
+# number of threads running the SQLite calls of the coroutines (configurable through config.async_workers); by default
+# as many as the idle connections kept by the connection pool, so that each thread reuses a pooled connection
+async_workers = getattr(config, 'async_workers', db.pool_size)
+
+# number of records read at a time by stream (configurable through config.stream_batch_size)
+stream_batch_size = getattr(config, 'stream_batch_size', 500)
+
+executor = ThreadPoolExecutor(max_workers = async_workers, thread_name_prefix = 'async_repository')
+
+# function to run a blocking call (with any positional and keyword arguments) on the executor, returning its result
+# without blocking the event loop
+async def run(function, *arguments, **keywords):
+    call = functools.partial(function, *arguments, **keywords)
+    return await asyncio.get_running_loop().run_in_executor(executor, call)
+
+# class giving asyncio access to the records of one table, through the repository of the table (each call runs on the
+# executor, so that the event loop carries on while SQLite works, and independent calls can run at the same time)
+class AsyncRepository:
+
+    def __init__(self, records):
+        self.records = records
+
+    # method to get the record with the given id (None if there is no such record)
+    async def get(self, id):
+        return await run(self.records.get, id)
+
+    # method to get a page of records ordered by id, starting after the given id (keyset pagination)
+    async def list(self, after_id = None, limit = 50):
+        return await run(self.records.list, after_id, limit)
+
+    # method to go through all the records ordered by id (read a batch at a time, so memory stays bounded however
+    # large the table is), e.g. async for record in async_repository.patients.stream(): ...
+    async def stream(self, batch_size = stream_batch_size):
+        after_id = None
+        while True:
+            records = await self.list(after_id, batch_size)
+            for record in records:
+                yield record
+            if len(records) < batch_size:
+                return
+            after_id = records[-1][0]
+
+    # the other methods of the repository (e.g. count, search or list_by_patient) are coroutines of the same name
+    def __getattr__(self, name):
+        method = getattr(self.records, name)
+        if not callable(method):
+            return method
+
+        @functools.wraps(method)
+        async def call(*arguments, **keywords):
+            return await run(method, *arguments, **keywords)
+        return call
+
+patients = AsyncRepository(repository.patients)
+doctors = AsyncRepository(repository.doctors)
+departments = AsyncRepository(repository.departments)
+prescriptions = AsyncRepository(repository.prescriptions)
+medical_tests = AsyncRepository(repository.medical_tests)
+
+# function to get the details of a patient along with their prescriptions and medical tests, read at the same time;
+# returns a (patient, prescriptions, medical tests) tuple (the patient is None if there is no such patient)
+async def patient_summary(patient_id):
+    return tuple(await asyncio.gather(
+        patients.get(patient_id),
+        prescriptions.list_by_patient(patient_id),
+        medical_tests.list_by_patient(patient_id),
+    ))
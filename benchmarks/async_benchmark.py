@@ -0,0 +1,104 @@
+# benchmark of the asyncio data access layer on a synthetic dataset: the details, prescriptions and medical tests of
+# patients read one after the other (as the pages do) and at the same time (async_repository.patient_summary), a whole
+# table streamed a batch at a time, and how long a large read keeps an event loop from serving anything else
+# usage: python -m benchmarks.async_benchmark [--patients 20000] [--summaries 200]
+import argparse
+import asyncio
+import time
+from benchmarks import common
+
+common.use_temporary_database('async')
+import database as db
+import repository
+import async_repository
+from benchmarks import dataset
+
+# function to read the details, prescriptions and medical tests of a patient one after the other
+def sequential_summary(patient_id):
+    return (repository.patients.get(patient_id), repository.prescriptions.list_by_patient(patient_id),
+            repository.medical_tests.list_by_patient(patient_id))
+
+# function to read the summaries of the given patients, all of them at the same time
+async def concurrent_summaries(patient_ids):
+    return await asyncio.gather(*(async_repository.patient_summary(patient_id) for patient_id in patient_ids))
+
+# function to count the records of a table by streaming them
+async def stream_count(records):
+    count = 0
+    async for record in records.stream():
+        count += 1
+    return count
+
+# function to run the given coroutine while measuring how late a heartbeat ticking every millisecond gets to run;
+# returns the largest delay (in milliseconds), i.e. the longest time the event loop was kept from serving anything else
+async def largest_stall(coroutine):
+    stalls = []
+    done = asyncio.Event()
+
+    async def heartbeat():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.001)
+            stalls.append((time.perf_counter() - start) * 1000 - 1)
+
+    ticking = asyncio.ensure_future(heartbeat())
+    await asyncio.sleep(0)
+    await coroutine
+    done.set()
+    await ticking
+    return max(stalls)
+
+# function to time the given coroutine function over a number of runs (in milliseconds)
+async def durations(function, runs):
+    result = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await function()
+        result.append((time.perf_counter() - start) * 1000)
+    return result
+
+# function to read a large page of patients directly on the event loop (as an async app calling the repository would)
+async def blocking_page():
+    repository.patients.list(None, page_size)
+
+async def measure(patient_ids):
+    one_summary = common.summarise(await durations(lambda: async_repository.patient_summary(patient_ids[0]), 200))
+    start = time.perf_counter()
+    await concurrent_summaries(patient_ids)
+    many_summaries = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    streamed = await stream_count(async_repository.prescriptions)
+    stream_seconds = time.perf_counter() - start
+    blocked = await largest_stall(blocking_page())
+    not_blocked = await largest_stall(async_repository.patients.list(None, page_size))
+    return one_summary, many_summaries, streamed, stream_seconds, blocked, not_blocked
+
+page_size = 10000       # number of patients read by the large page
+
+def main(patients, summaries):
+    data = dataset.generate(db, patients)
+    patient_ids = data.sample_ids('P', summaries)
+    sequential_summary(patient_ids[0])
+    one_sequential = common.summarise(common.durations(lambda: sequential_summary(patient_ids[0]), 200))
+    start = time.perf_counter()
+    for patient_id in patient_ids:
+        sequential_summary(patient_id)
+    many_sequential = (time.perf_counter() - start) * 1000
+    one_summary, many_summaries, streamed, stream_seconds, blocked, not_blocked = asyncio.run(measure(patient_ids))
+
+    print(f'{patients} patients, {async_repository.async_workers} worker threads')
+    print(f"one patient summary, sequential (p50):       {one_sequential['p50_ms']:10.3f} ms")
+    print(f"one patient summary, concurrent (p50):       {one_summary['p50_ms']:10.3f} ms")
+    print(f'{summaries} patient summaries, sequential:          {many_sequential:10.1f} ms')
+    print(f'{summaries} patient summaries, concurrent:          {many_summaries:10.1f} ms')
+    print(f'prescriptions streamed:                      {streamed:10d} ({streamed / stream_seconds:.0f} records/s)')
+    print(f'event loop stalled by a page of {page_size} patients:')
+    print(f'  read on the event loop:                    {blocked:10.1f} ms')
+    print(f'  read through async_repository:             {not_blocked:10.1f} ms')
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Benchmark the asyncio data access layer.')
+    parser.add_argument('--patients', type = int, default = 20000, help = 'number of patients of the generated dataset')
+    parser.add_argument('--summaries', type = int, default = 200, help = 'number of patient summaries read together')
+    arguments = parser.parse_args()
+    main(arguments.patients, arguments.summaries)
@@ -0,0 +1,47 @@
+import os
+import sys
+import tempfile
+import time
+import types
+
+repo_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if repo_dir not in sys.path:
+    sys.path.insert(0, repo_dir)
+
+# function to point the application's configuration at the given database (name without the .db extension)
+def use_database(database_name):
+    config = types.ModuleType('config')
+    config.database_name = database_name
+    sys.modules['config'] = config
+    return config.database_name + '.db'
+
+# function to point the application's configuration at a throwaway database so that benchmarks never touch real data
+def use_temporary_database(name = 'benchmark'):
+    directory = tempfile.mkdtemp(prefix = 'hims_benchmark_')
+    return use_database(os.path.join(directory, name))
+
+# function to time the given function over a number of runs and return the mean duration per run (in microseconds)
+def time_per_call(function, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        function()
+    return (time.perf_counter() - start) / runs * 1e6
+
+# function to time each of a number of calls of the given function and return their durations (in milliseconds)
+def durations(function, runs):
+    result = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        result.append((time.perf_counter() - start) * 1000)
+    return result
+
+# function to summarise a list of durations (in milliseconds) as the statistics reported in the JSON results
+def summarise(durations):
+    ordered = sorted(durations)
+    percentile = lambda p : ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+    return {
+        'runs': len(ordered), 'mean_ms': round(sum(ordered) / len(ordered), 4),
+        'p50_ms': round(percentile(50), 4), 'p95_ms': round(percentile(95), 4), 'p99_ms': round(percentile(99), 4),
+        'min_ms': round(ordered[0], 4), 'max_ms': round(ordered[-1], 4)
+    }
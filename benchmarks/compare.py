@@ -0,0 +1,37 @@
+# command comparing two JSON results of the benchmark suite (e.g. of two commits), flagging the scenarios whose median
+# latency grew by more than the tolerance; exits with status 1 if any did, so that it can gate a build
+# usage: python -m benchmarks.compare <baseline.json> <results.json> [--tolerance 0.2]
+import argparse
+import json
+import sys
+
+# function to compare the scenarios of two results, returning a list of (scenario, baseline ms, result ms, ratio) tuples
+# for the scenarios found in both
+def compare(baseline, results):
+    rows = []
+    for scenario, statistics in results['scenarios'].items():
+        if scenario in baseline['scenarios']:
+            before, after = baseline['scenarios'][scenario]['p50_ms'], statistics['p50_ms']
+            rows.append((scenario, before, after, after / before if before > 0 else float('inf')))
+    return rows
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Compare two results of the benchmark suite.')
+    parser.add_argument('baseline', help = 'JSON results to compare against')
+    parser.add_argument('results', help = 'JSON results to be compared')
+    parser.add_argument('--tolerance', type = float, default = 0.2,
+                        help = 'relative growth of the median latency above which a scenario counts as a regression')
+    arguments = parser.parse_args()
+    with open(arguments.baseline) as file:
+        baseline = json.load(file)
+    with open(arguments.results) as file:
+        results = json.load(file)
+    if baseline['dataset'] != results['dataset']:
+        print('Warning: the results were measured on different datasets', file = sys.stderr)
+    regressions = 0
+    print(f"{'scenario':<40} {'baseline p50 (ms)':>18} {'p50 (ms)':>10} {'ratio':>7}")
+    for scenario, before, after, ratio in compare(baseline, results):
+        regression = ratio > 1 + arguments.tolerance
+        regressions += regression
+        print(f"{scenario:<40} {before:>18.3f} {after:>10.3f} {ratio:>7.2f}{'  REGRESSION' if regression else ''}")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,155 @@
+# benchmark of mixed add/search traffic from concurrent sessions against the five tables, comparing the
+# default rollback journal with the WAL PRAGMA profile applied by database.py
+# usage: python -m benchmarks.concurrency_benchmark [number_of_sessions] [seconds_per_run]
+import random
+import sys
+import threading
+import time
+from benchmarks import common
+
+database_path = common.use_temporary_database('concurrency')
+import database as db
+
+# the connections of the baseline: rollback journal, synchronous FULL and the 5 second timeout of sqlite3.connect
+rollback_journal_profile = { 'journal_mode': 'DELETE', 'synchronous': 'FULL', 'busy_timeout': 5000 }
+
+# function to add one record to the given table (reusing existing patients/doctors/departments as parents)
+def add_record(c, table, n):
+    if table == 'department_record':
+        c.execute(
+            """
+            INSERT INTO department_record
+            (id, name, description, contact_number_1, address, email_id)
+            VALUES (:id, :id, 'Description', '9000000000', 'Address', :id);
+            """,
+            { 'id': f'D-{n}' }
+        )
+    elif table == 'doctor_record':
+        c.execute(
+            """
+            INSERT INTO doctor_record
+            (
+                id, name, gender, date_of_birth, blood_group, department_id,
+                contact_number_1, aadhar_or_voter_id, email_id,
+                qualification, specialisation, years_of_experience, address,
+                city, state, pin_code
+            )
+            VALUES (:id, 'Name', 'Male', '1980-01-01', 'A+ve', 'D-0',
+                    '9000000000', :id, :id, 'MBBS', 'General', 10, 'Address',
+                    'City', 'State', '000000');
+            """,
+            { 'id': f'DR-{n}' }
+        )
+    elif table == 'patient_record':
+        c.execute(
+            """
+            INSERT INTO patient_record
+            (
+                id, name, gender, date_of_birth, blood_group,
+                contact_number_1, aadhar_or_voter_id, weight, height,
+                address, city, state, pin_code, next_of_kin_name,
+                next_of_kin_relation_to_patient, next_of_kin_contact_number,
+                date_of_registration, time_of_registration
+            )
+            VALUES (:id, 'Name', 'Female', '1990-01-01', 'O+ve', '9000000000', :id,
+                    60, 160, 'Address', 'City', 'State', '000000', 'Kin', 'Mother',
+                    '9000000001', '2020-01-01', '00:00:00');
+            """,
+            { 'id': f'P-{n}' }
+        )
+    elif table == 'prescription_record':
+        c.execute(
+            """
+            INSERT INTO prescription_record
+            (id, patient_id, doctor_id, diagnosis)
+            VALUES (:id, 'P-0', 'DR-0', 'Diagnosis');
+            """,
+            { 'id': f'M-{n}' }
+        )
+        c.execute(
+            """
+            INSERT INTO prescription_item
+            (prescription_id, position, medicine_name, dosage_description)
+            VALUES (:id, 1, 'Medicine', 'Dosage');
+            """,
+            { 'id': f'M-{n}' }
+        )
+    else:
+        c.execute(
+            """
+            INSERT INTO medical_test_record
+            (
+                id, test_name, patient_id, doctor_id,
+                medical_lab_scientist_id, test_date_time, result_date_time, cost
+            )
+            VALUES (:id, 'Test', 'P-0', 'DR-0', 'MLS-0',
+                    '2020-01-01 10:00', '2020-01-01 12:00', 100);
+            """,
+            { 'id': f'T-{n}' }
+        )
+
+# function to run one session issuing a mix of searches (80%) and additions (20%) until the deadline
+def session(number, deadline, results):
+    generator = random.Random(number)
+    counter = number * 10_000_000
+    while time.perf_counter() < deadline:
+        table = generator.choice(db.record_tables)
+        write = generator.random() < 0.2
+        start = time.perf_counter()
+        try:
+            with db.connection() as (conn, c):
+                if write:
+                    counter += 1
+                    with conn:
+                        add_record(c, table, counter)
+                else:
+                    c.execute(f'SELECT * FROM {db.record_view(table)} WHERE id = :id;', { 'id': f'{table[0]}-0' })
+                    c.fetchall()
+                    if table in ('prescription_record', 'medical_test_record'):
+                        c.execute(f'SELECT * FROM {db.record_view(table)} WHERE patient_id = :p_id;', { 'p_id': 'P-0' })
+                        c.fetchmany(50)
+            results['write' if write else 'read'].append(time.perf_counter() - start)
+        except db.sql.OperationalError:         # 'database is locked'
+            results['locked'] += 1
+
+# function to run the mixed workload with the given PRAGMA profile against a fresh copy of the database
+def run(name, profile, sessions, seconds):
+    path = f'{database_path[:-3]}_{name}.db'
+    db.pragmas.update(profile)
+    db.pool.close_all()
+    db.pool = db.ConnectionPool(path, sessions)
+    db.schema_ready = False
+    db.db_init()
+    with db.connection() as (conn, c):
+        with conn:
+            for table in ('department_record', 'doctor_record', 'patient_record',
+                          'prescription_record', 'medical_test_record'):
+                add_record(c, table, 0)
+    results = { 'read': [], 'write': [], 'locked': 0 }
+    deadline = time.perf_counter() + seconds
+    threads = [threading.Thread(target = session, args = (n + 1, deadline, results)) for n in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with db.connection() as (conn, c):
+        c.execute('PRAGMA journal_mode;')
+        mode = c.fetchone()[0]
+    db.pool.close_all()
+    for kind in ('read', 'write'):
+        latencies = sorted(results[kind]) or [0]
+        print(f'{name:>16} ({mode:>6}) {kind:>5}s: {len(results[kind]) / seconds:9.0f}/s  '
+              f'p50 {latencies[len(latencies) // 2] * 1e3:7.2f} ms  '
+              f'p99 {latencies[int(len(latencies) * 0.99)] * 1e3:7.2f} ms')
+    print(f"{name:>16} ({mode:>6}) locked errors: {results['locked']}")
+
+def main(sessions, seconds):
+    defaults = dict(db.pragmas)
+    run('rollback-journal', rollback_journal_profile, sessions, seconds)
+    db.pragmas.clear()
+    db.pragmas.update(defaults)
+    run('wal-profile', {}, sessions, seconds)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 8,
+         float(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -0,0 +1,281 @@
+# deterministic generator of a synthetic hospital (departments, doctors, patients, prescriptions with their medicines
+# and medical tests) of any size, written straight into an application database in batches, so that memory use doesn't
+# grow with the number of rows; the same number of patients and seed always give the same records and ids
+# usage: python -m benchmarks.dataset <database_name> [--patients N] [--seed N] [--batch-size N]
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import date, timedelta
+from benchmarks import common
+import ids
+
+department_names = (
+    'General Medicine', 'Cardiology', 'Dermatology', 'Neurology', 'Orthopaedics', 'Paediatrics', 'Gynaecology',
+    'Ophthalmology', 'ENT', 'Psychiatry', 'Oncology', 'Nephrology', 'Gastroenterology', 'Pulmonology',
+    'Endocrinology', 'Urology', 'Radiology', 'Pathology', 'Anaesthesiology', 'Emergency Medicine'
+)
+first_names = (
+    'Aarav', 'Vivaan', 'Aditya', 'Vihaan', 'Arjun', 'Sai', 'Reyansh', 'Ayaan', 'Krishna', 'Ishaan', 'Prateek',
+    'Rohan', 'Kabir', 'Aniket', 'Rahul', 'Ananya', 'Diya', 'Aadhya', 'Saanvi', 'Pari', 'Anika', 'Navya', 'Myra',
+    'Sara', 'Kiara', 'Meera', 'Priya', 'Kavya', 'Riya', 'Ishita', 'Neha', 'Pooja', 'Kumudini', 'Lakshmi', 'Zoya'
+)
+last_names = (
+    'Sharma', 'Verma', 'Gupta', 'Singh', 'Kumar', 'Patel', 'Shah', 'Mehta', 'Iyer', 'Nair', 'Reddy', 'Rao',
+    'Das', 'Bose', 'Chatterjee', 'Mukherjee', 'Banerjee', 'Senapati', 'Mishra', 'Pandey', 'Joshi', 'Kulkarni',
+    'Deshpande', 'Menon', 'Pillai', 'Khan', 'Ahmed', 'Fernandes', 'DSouza', 'Kapoor', 'Malhotra', 'Chopra'
+)
+places = (
+    ('Dehradun', 'Uttarakhand', '248'), ('Ambala', 'Haryana', '133'), ('Delhi', 'Delhi', '110'),
+    ('Mumbai', 'Maharashtra', '400'), ('Pune', 'Maharashtra', '411'), ('Bengaluru', 'Karnataka', '560'),
+    ('Chennai', 'Tamil Nadu', '600'), ('Kolkata', 'West Bengal', '700'), ('Hyderabad', 'Telangana', '500'),
+    ('Jaipur', 'Rajasthan', '302'), ('Lucknow', 'Uttar Pradesh', '226'), ('Bhubaneswar', 'Odisha', '751'),
+    ('Kochi', 'Kerala', '682'), ('Ahmedabad', 'Gujarat', '380'), ('Patna', 'Bihar', '800'), ('Bhopal', 'Madhya Pradesh', '462')
+)
+streets = ('MG Road', 'Station Road', 'Clement Town', 'Civil Lines', 'Model Town', 'Park Street', 'Gandhi Nagar', 'Sector 12')
+blood_groups = ('A+ve', 'A-ve', 'B+ve', 'B-ve', 'AB+ve', 'AB-ve', 'O+ve', 'O-ve')
+relations = ('Mother', 'Father', 'Spouse', 'Son', 'Daughter', 'Brother', 'Sister')
+qualifications = ('MBBS', 'MBBS, MD', 'MBBS, MS', 'MBBS, DNB', 'MBBS, MD, DM')
+diagnoses = (
+    'Cough', 'Common cold', 'Viral fever', 'Hypertension', 'Type 2 diabetes', 'Migraine', 'Gastritis', 'Asthma',
+    'Allergic rhinitis', 'Back pain', 'Anaemia', 'Urinary tract infection', 'Dermatitis', 'Hypothyroidism', 'Sprain'
+)
+medicines = (
+    'Paracetamol 500 mg', 'Azithromycin 500 mg', 'Amoxicillin 250 mg', 'Cetirizine 10 mg', 'Pantoprazole 40 mg',
+    'Metformin 500 mg', 'Amlodipine 5 mg', 'Levothyroxine 50 mcg', 'Ibuprofen 400 mg', 'Salbutamol inhaler',
+    'Vitamin D3 60000 IU', 'Iron and folic acid', 'Ondansetron 4 mg', 'Montelukast 10 mg', 'Diclofenac gel'
+)
+dosages = ('1 tablet after breakfast', '1 tablet twice a day after meals', '1 tablet at bedtime',
+           '1 tablet thrice a day for 5 days', '2 puffs when required', 'Apply twice a day', None)
+tests = (
+    ('Complete blood count', 300), ('Blood test for malaria', 400), ('Lipid profile', 600), ('HbA1c', 500),
+    ('Thyroid profile', 700), ('Liver function test', 800), ('Kidney function test', 800), ('Urine routine', 150),
+    ('Chest X-ray', 450), ('ECG', 250), ('Ultrasound abdomen', 1200), ('MRI brain', 6500)
+)
+results = ('Normal.', 'Within normal limits.', 'Mildly elevated, follow up in 3 months.', 'Abnormal, refer to specialist.',
+           "Negative. The patient doesn't have malaria.", 'Positive, treatment started.')
+
+first_day = date(2015, 1, 1)        # earliest date of registration, prescription and medical test
+last_day = date(2025, 12, 31)
+id_epoch = 1420070400000            # milliseconds since the Unix epoch encoded in the first generated id (2015-01-01)
+
+# average number of records of each kind per patient (and patients per doctor)
+patients_per_doctor = 50
+prescriptions_per_patient = 3
+medical_tests_per_patient = 2
+
+# function to get the id of the record with the given number, in the same format as the ids generated by the application
+def record_id(prefix, number):
+    return f'{prefix}-{ids.encode(id_epoch + number, ids.time_width)}-{ids.encode(0, ids.node_width + ids.sequence_width)}'
+
+# function to get a random date (as YYYY-MM-DD) between the given dates
+def random_date(generator, start, end):
+    return (start + timedelta(days = generator.randrange((end - start).days + 1))).isoformat()
+
+# function to get the distinct twelve digit Aadhar number of the record with the given number (a permutation of the
+# numbers below 900000000000, so that numbers starting with 9 are left free for records added while benchmarking)
+def unique_number(number, seed):
+    return f'{(number * 611953 + seed) % 900000000000:012d}'
+
+# function to get a random ten digit contact number
+def random_phone(generator):
+    return str(generator.randrange(6000000000, 10000000000))
+
+# class describing a synthetic dataset of a given size and generating its records
+class Dataset:
+
+    def __init__(self, patients, seed = 0):
+        self.seed = seed
+        self.patients = patients
+        self.departments = len(department_names)
+        self.doctors = max(self.departments, patients // patients_per_doctor)
+        self.prescriptions = patients * prescriptions_per_patient
+        self.medical_tests = patients * medical_tests_per_patient
+
+    # method to get the random number generator of the given table (each table has its own, so that the records of one
+    # table don't depend on how many of another were generated)
+    def random(self, table):
+        return random.Random(f'{self.seed}:{table}')
+
+    # method to get the number of records of each table, keyed by table name
+    def counts(self):
+        return {
+            'department_record': self.departments, 'doctor_record': self.doctors, 'patient_record': self.patients,
+            'prescription_record': self.prescriptions, 'medical_test_record': self.medical_tests
+        }
+
+    # method to pick a sample of existing ids of the given kind ('P', 'DR', 'D', 'M' or 'T'), the same for the same seed
+    def sample_ids(self, prefix, size):
+        count = { 'D': self.departments, 'DR': self.doctors, 'P': self.patients,
+                  'M': self.prescriptions, 'T': self.medical_tests }[prefix]
+        generator = random.Random(f'{self.seed}:sample:{prefix}')
+        return [record_id(prefix, generator.randrange(count)) for _ in range(size)]
+
+    def department_rows(self):
+        generator = self.random('department_record')
+        for i, name in enumerate(department_names):
+            yield {
+                'id': record_id('D', i), 'name': name, 'description': f'Diagnosis and treatment in {name.lower()}',
+                'contact_number_1': random_phone(generator), 'contact_number_2': None,
+                'address': f'Floor {i // 4}, Block {"ABCDE"[i % 5]}, City Hospital',
+                'email_id': name.lower().replace(' ', '_') + '@cityhospital.in'
+            }
+
+    def doctor_rows(self):
+        generator = self.random('doctor_record')
+        for i in range(self.doctors):
+            name = f'{generator.choice(first_names)} {generator.choice(last_names)}'
+            city, state, pin = generator.choice(places)
+            yield {
+                'id': record_id('DR', i), 'name': name, 'gender': generator.choice(('Female', 'Male')),
+                'date_of_birth': random_date(generator, date(1955, 1, 1), date(1995, 12, 31)),
+                'blood_group': generator.choice(blood_groups), 'department_id': record_id('D', i % self.departments),
+                'contact_number_1': random_phone(generator), 'contact_number_2': None,
+                'aadhar_or_voter_id': unique_number(i, self.seed),
+                'email_id': name.lower().replace(' ', '.') + f'{i}@cityhospital.in',
+                'qualification': generator.choice(qualifications),
+                'specialisation': department_names[i % self.departments],
+                'years_of_experience': generator.randrange(1, 40),
+                'address': f'{generator.randrange(1, 500)}, {generator.choice(streets)}',
+                'city': city, 'state': state, 'pin_code': pin + f'{generator.randrange(1000):03d}'
+            }
+
+    def patient_rows(self):
+        generator = self.random('patient_record')
+        for i in range(self.patients):
+            name = f'{generator.choice(first_names)} {generator.choice(last_names)}'
+            city, state, pin = generator.choice(places)
+            yield {
+                'id': record_id('P', i), 'name': name, 'gender': generator.choice(('Female', 'Male')),
+                'date_of_birth': random_date(generator, date(1930, 1, 1), date(2024, 12, 31)),
+                'blood_group': generator.choice(blood_groups), 'contact_number_1': random_phone(generator),
+                'contact_number_2': random_phone(generator) if generator.random() < 0.3 else None,
+                'aadhar_or_voter_id': unique_number(i, self.seed),
+                'weight': generator.randrange(3, 120), 'height': generator.randrange(50, 200),
+                'address': f'{generator.randrange(1, 500)}, {generator.choice(streets)}',
+                'city': city, 'state': state, 'pin_code': pin + f'{generator.randrange(1000):03d}',
+                'next_of_kin_name': f'{generator.choice(first_names)} {name.split()[1]}',
+                'next_of_kin_relation_to_patient': generator.choice(relations),
+                'next_of_kin_contact_number': random_phone(generator),
+                'email_id': name.lower().replace(' ', '.') + f'{i}@example.com' if generator.random() < 0.6 else None,
+                'date_of_registration': random_date(generator, first_day, last_day),
+                'time_of_registration': f'{generator.randrange(24):02d}:{generator.randrange(60):02d}:{generator.randrange(60):02d}'
+            }
+
+    # method to generate the prescriptions, each along with the list of its medicines
+    def prescription_rows(self):
+        generator = self.random('prescription_record')
+        for i in range(self.prescriptions):
+            id = record_id('M', i)
+            items = [
+                { 'prescription_id': id, 'position': position, 'medicine_name': generator.choice(medicines),
+                  'dosage_description': generator.choice(dosages) }
+                for position in range(1, generator.randrange(1, 5) + 1)
+            ]
+            yield {
+                'id': id, 'patient_id': record_id('P', generator.randrange(self.patients)),
+                'doctor_id': record_id('DR', generator.randrange(self.doctors)),
+                'date_time': f'{random_date(generator, first_day, last_day)} {generator.randrange(8, 20):02d}:{generator.randrange(60):02d}',
+                'diagnosis': generator.choice(diagnoses),
+                'comments': 'Review after a week' if generator.random() < 0.2 else None
+            }, items
+
+    def medical_test_rows(self):
+        generator = self.random('medical_test_record')
+        for i in range(self.medical_tests):
+            test_name, cost = generator.choice(tests)
+            test_day = random_date(generator, first_day, last_day)
+            hour = generator.randrange(8, 18)
+            yield {
+                'id': record_id('T', i), 'test_name': test_name,
+                'patient_id': record_id('P', generator.randrange(self.patients)),
+                'doctor_id': record_id('DR', generator.randrange(self.doctors)),
+                'medical_lab_scientist_id': f'MLS-{generator.randrange(1, 200)}',
+                'test_date_time': f'{test_day} {hour:02d}:00',
+                'result_date_time': f'{test_day} {hour + generator.randrange(1, 6):02d}:30',
+                'result_and_diagnosis': generator.choice(results), 'description': None, 'comments': None,
+                'cost': cost
+            }
+
+    # method to insert every record of the dataset into the database (one transaction per batch of records)
+    def write(self, db, batch_size = 10000, progress = None):
+        tables = (
+            ('department_record', self.department_rows),
+            ('doctor_record', self.doctor_rows),
+            ('patient_record', self.patient_rows),
+            ('prescription_record', self.prescription_rows),
+            ('medical_test_record', self.medical_test_rows),
+        )
+        with db.connection() as (conn, c):
+            for table, rows in tables:
+                batch, written = [], 0
+                for row in rows():
+                    batch.append(row)
+                    if len(batch) == batch_size:
+                        self.insert(conn, c, table, batch)
+                        written += len(batch)
+                        batch = []
+                        if progress:
+                            progress(table, written, self.counts()[table])
+                if batch:
+                    self.insert(conn, c, table, batch)
+                    written += len(batch)
+                    if progress:
+                        progress(table, written, self.counts()[table])
+
+    # method to insert a batch of records into the given table (along with the medicines of prescriptions)
+    def insert(self, conn, c, table, batch):
+        if table == 'prescription_record':
+            batch, items = [prescription for prescription, _ in batch], [item for _, medicines in batch for item in medicines]
+        columns = list(batch[0])
+        with conn:
+            c.executemany(
+                f"""
+                INSERT INTO {table} ({', '.join(columns)})
+                VALUES ({', '.join(':' + column for column in columns)});
+                """,
+                batch
+            )
+            if table == 'prescription_record':
+                c.executemany(
+                    """
+                    INSERT INTO prescription_item (prescription_id, position, medicine_name, dosage_description)
+                    VALUES (:prescription_id, :position, :medicine_name, :dosage_description);
+                    """,
+                    items
+                )
+
+    # method to get the description of the dataset saved next to its database (and read back by the benchmark suite)
+    def description(self):
+        return { 'patients': self.patients, 'seed': self.seed, 'records': self.counts() }
+
+# function to get the file holding the description of the dataset in the given database
+def description_path(database_name):
+    return database_name + '.dataset.json'
+
+# function to create the schema and write a dataset of the given size into the configured database
+def generate(db, patients, seed = 0, batch_size = 10000, progress = None):
+    dataset = Dataset(patients, seed)
+    db.db_init()
+    dataset.write(db, batch_size, progress)
+    with open(description_path(db.config.database_name), 'w') as description:
+        json.dump(dataset.description(), description, indent = 2)
+    return dataset
+
+# function to report the progress of the generation on standard error
+def report_progress(table, written, total):
+    print(f'\r{table}: {written:,} of {total:,} records', end = '\n' if written == total else '', file = sys.stderr, flush = True)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Generate a synthetic hospital dataset into a new database.')
+    parser.add_argument('database_name', help = 'database to create (without the .db extension)')
+    parser.add_argument('--patients', type = int, default = 10000, help = 'number of patients (other tables scale with it)')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the random records')
+    parser.add_argument('--batch-size', type = int, default = 10000, help = 'number of records inserted per transaction')
+    arguments = parser.parse_args()
+    common.use_database(arguments.database_name)
+    import database as db       # imported once the configuration points at the new database
+    start = time.perf_counter()
+    dataset = generate(db, arguments.patients, arguments.seed, arguments.batch_size, report_progress)
+    print(f'Generated {sum(dataset.counts().values()):,} records in {time.perf_counter() - start:.1f} s', file = sys.stderr)
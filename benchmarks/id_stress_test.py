@@ -0,0 +1,50 @@
+# stress test generating ids concurrently from several processes and threads, checking that they are unique
+# and that every thread receives them in time order
+# usage: python -m benchmarks.id_stress_test [number_of_processes] [threads_per_process] [ids_per_thread]
+import multiprocessing
+import sys
+import threading
+import time
+from benchmarks import common  # noqa: F401 (puts the repository on sys.path)
+import ids
+
+# function to generate ids from several threads of one process and send them back to the parent process
+def worker(threads, count, results):
+    generated = [None] * threads
+
+    def generate(thread):
+        generated[thread] = [ids.generate_id('M') for _ in range(count)]
+
+    workers = [threading.Thread(target = generate, args = (n,)) for n in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    results.put(generated)
+
+def main(processes, threads, count):
+    results = multiprocessing.Queue()
+    start = time.perf_counter()
+    workers = [multiprocessing.Process(target = worker, args = (threads, count, results)) for _ in range(processes)]
+    for process in workers:
+        process.start()
+    generated = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+    elapsed = time.perf_counter() - start
+    total = processes * threads * count
+    unique = set()
+    out_of_order = 0
+    for process_ids in generated:
+        for thread_ids in process_ids:
+            unique.update(thread_ids)
+            out_of_order += sum(1 for a, b in zip(thread_ids, thread_ids[1:]) if a >= b)
+    print(f'generated {total} ids in {elapsed:.2f} s ({total / elapsed:,.0f} ids/s) '
+          f'from {processes} processes x {threads} threads')
+    print(f'duplicates: {total - len(unique)}, out of order within a thread: {out_of_order}')
+    return total == len(unique) and out_of_order == 0
+
+if __name__ == '__main__':
+    arguments = [int(argument) for argument in sys.argv[1:]]
+    processes, threads, count = arguments + [4, 4, 125000][len(arguments):]
+    sys.exit(0 if main(processes, threads, count) else 1)
@@ -0,0 +1,36 @@
+# benchmark measuring the cost of schema setup paid by every Streamlit rerun (home() calls db.db_init() on each run)
+# usage: python -m benchmarks.schema_init_benchmark [number_of_reruns]
+import sys
+import time
+from benchmarks import common
+
+common.use_temporary_database('schema_init')
+import database as db
+
+# function replicating the previous behaviour (one CREATE TABLE IF NOT EXISTS transaction per table on every rerun)
+def legacy_db_init():
+    with db.connection() as (conn, c):
+        for statement in db.migrations[1]:
+            with conn:
+                c.execute(statement)
+
+def main(reruns):
+    start = time.perf_counter()
+    db.db_init()
+    first = (time.perf_counter() - start) * 1e6
+
+    # a new process opening an existing, up to date database only reads the schema version
+    db.schema_ready = False
+    start = time.perf_counter()
+    db.db_init()
+    new_process = (time.perf_counter() - start) * 1e6
+
+    rerun = common.time_per_call(db.db_init, reruns)
+    legacy = common.time_per_call(legacy_db_init, reruns)
+    print(f'first run on an empty database:       {first:10.1f} us')
+    print(f'first run of a new process:           {new_process:10.1f} us')
+    print(f'each later rerun:                     {rerun:10.3f} us')
+    print(f'each rerun before (per-rerun init):   {legacy:10.1f} us')
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,91 @@
+# benchmark of the reporting reads (pages of the complete records, their counts and the medical tests of a patient)
+# while clerks keep adding patients, read from the database the clerks write to and from a snapshot of it
+# usage: python -m benchmarks.snapshot_benchmark [--patients 20000] [--clerks 4] [--readers 4] [--seconds 3]
+import argparse
+import itertools
+import threading
+import time
+from benchmarks import common
+
+common.use_temporary_database('snapshot')
+import database as db
+import pagination
+import repository
+import snapshot
+from benchmarks import dataset
+
+numbers = itertools.count(10 ** 11)         # makes the Aadhar IDs (which must be unique) of the patients added
+
+# function to add one patient through the repository
+def add_patient():
+    n = next(numbers)
+    repository.patients.insert({
+        'name': f'Patient {n}', 'gender': 'Female', 'date_of_birth': '1990-01-01', 'blood_group': 'O+ve',
+        'contact_number_1': '9000000000', 'aadhar_or_voter_id': str(n), 'weight': 60, 'height': 160,
+        'address': 'Address', 'city': 'City', 'state': 'State', 'pin_code': '000000', 'next_of_kin_name': 'Kin',
+        'next_of_kin_relation_to_patient': 'Mother', 'next_of_kin_contact_number': '9000000001',
+        'date_of_registration': '2020-01-01', 'time_of_registration': '00:00:00'
+    })
+
+# function to run one reporting read: a page of patients deep into the table, the count shown above it and the
+# medical tests of a patient
+def reporting_read(patient_id):
+    repository.patients.list(patient_id, pagination.page_size + 1)
+    repository.patients.count()
+    repository.medical_tests.list_by_patient(patient_id)
+
+# function to run the given numbers of clerks and readers for the given number of seconds; returns the latencies of
+# the reporting reads (in milliseconds) and the number of patients added
+def run(data, clerks, readers, seconds):
+    deadline = time.perf_counter() + seconds
+    latencies, added = [], []
+    lock = threading.Lock()
+
+    def clerk():
+        count = 0
+        while time.perf_counter() < deadline:
+            add_patient()
+            count += 1
+        with lock:
+            added.append(count)
+
+    def reader(number):
+        patient_ids = itertools.cycle(data.sample_ids('P', 100 + number)[number:])
+        own = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            reporting_read(next(patient_ids))
+            own.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target = clerk) for _ in range(clerks)]
+    threads += [threading.Thread(target = reader, args = (n,)) for n in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, sum(added)
+
+def main(patients, clerks, readers, seconds):
+    data = dataset.generate(db, patients)
+    print(f'{patients} patients, {clerks} clerks adding patients, {readers} readers, {seconds} s per run')
+    print(f"{'reads from':<12} {'reads/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9} {'adds/s':>8}")
+    for name, enabled in (('database', False), ('snapshot', True)):
+        snapshot.enabled = enabled
+        if enabled:
+            snapshot.snapshot.refresh()
+        latencies, added = run(data, clerks, readers, seconds)
+        statistics = common.summarise(latencies)
+        print(f"{name:<12} {len(latencies) / seconds:>8.0f} {statistics['p50_ms']:>9.2f} {statistics['p95_ms']:>9.2f} "
+              f"{statistics['p99_ms']:>9.2f} {added / seconds:>8.0f}")
+    print(f"refreshing the snapshot took {snapshot.snapshot.stats()['last_refresh_ms']} ms")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Benchmark the reporting reads with and without the snapshot.')
+    parser.add_argument('--patients', type = int, default = 20000, help = 'number of patients of the generated dataset')
+    parser.add_argument('--clerks', type = int, default = 4, help = 'number of clerks adding patients meanwhile')
+    parser.add_argument('--readers', type = int, default = 4, help = 'number of sessions running reporting reads')
+    parser.add_argument('--seconds', type = float, default = 3, help = 'duration of each run')
+    arguments = parser.parse_args()
+    main(arguments.patients, arguments.clerks, arguments.readers, arguments.seconds)
@@ -0,0 +1,87 @@
+# benchmark measuring the cold start of the app: each run starts a new Python process with -X importtime, runs
+# hims_app.py in bare mode up to the password prompt and reads the import profile it printed; exits with status 1 if
+# the median import time goes over the budget or if a module meant to load lazily was imported before the password
+# usage: python -m benchmarks.startup_benchmark [--runs 5] [--budget 600] [--top 15]
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from benchmarks import common
+
+# modules that should only be imported once a menu is selected (after the password is checked)
+lazy_modules = ('pandas', 'patient', 'doctor', 'department', 'prescription', 'medical_test', 'repository', 'database')
+
+# code run by each new process: a configuration of its own (with a throwaway database, and a password that is never
+# typed, so the app stops at the password prompt) and the app script itself
+startup_code = """
+import sys, types
+sys.path.insert(0, {repo_dir!r})
+config = types.ModuleType('config')
+config.password = 'not typed'
+config.database_name = {database_name!r}
+sys.modules['config'] = config
+import runpy
+runpy.run_path({app!r}, run_name = '__main__')
+"""
+
+# function to parse the profile printed by -X importtime into a list of (module, self us, cumulative us, depth) tuples
+def parse_profile(output):
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((name.strip(), int(own), int(cumulative), depth))
+    return rows
+
+# function to start the app once, returning its wall time (in milliseconds) and its import profile
+def start_app(code):
+    start = time.perf_counter()
+    process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                             capture_output = True, text = True, cwd = common.repo_dir)
+    wall_time = (time.perf_counter() - start) * 1000
+    if process.returncode != 0:
+        errors = [line for line in process.stderr.splitlines() if not line.startswith('import time:')]
+        sys.exit('The app failed to start:\n' + '\n'.join(errors))
+    return wall_time, parse_profile(process.stderr)
+
+def main(runs, budget, top):
+    code = startup_code.format(repo_dir = common.repo_dir, app = os.path.join(common.repo_dir, 'hims_app.py'),
+                               database_name = os.path.join(tempfile.mkdtemp(prefix = 'hims_benchmark_'), 'startup'))
+    wall_times, import_times = [], []
+    for _ in range(runs):
+        wall_time, profile = start_app(code)
+        wall_times.append(wall_time)
+        import_times.append(sum(cumulative for _, _, cumulative, depth in profile if depth == 0) / 1000)
+    loaded = { module for module, _, _, _ in profile }
+    eager = [module for module in lazy_modules if module in loaded]
+
+    print(f'process wall time (median of {runs}):  {statistics.median(wall_times):8.1f} ms')
+    print(f'import time (median of {runs}):        {statistics.median(import_times):8.1f} ms (budget {budget} ms)')
+    print(f'modules imported:                   {len(loaded):8d}')
+    print('\nslowest top-level imports of the last run:')
+    top_level = sorted((row for row in profile if row[3] == 0), key = lambda row : row[2], reverse = True)
+    for module, _, cumulative, _ in top_level[:top]:
+        print(f'  {module:<40} {cumulative / 1000:8.1f} ms')
+
+    failed = False
+    if eager:
+        print(f"\nimported before the password prompt (should load lazily): {', '.join(eager)}")
+        failed = True
+    if statistics.median(import_times) > budget:
+        print(f'\nthe median import time is over the budget of {budget} ms')
+        failed = True
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Measure the cold start of the app up to the password prompt.')
+    parser.add_argument('--runs', type = int, default = 5, help = 'number of processes started')
+    parser.add_argument('--budget', type = float, default = 600,
+                        help = 'median import time (in milliseconds) above which the benchmark fails')
+    parser.add_argument('--top', type = int, default = 15, help = 'number of slowest top-level imports listed')
+    arguments = parser.parse_args()
+    main(arguments.runs, arguments.budget, arguments.top)
@@ -0,0 +1,339 @@
+# reproducible benchmark suite running the application's own code paths (the verify_*_id helpers, the repositories of
+# the data layer, the complete records shown a page at a time, the listings of a patient's records and the add and
+# update forms) against a synthetic dataset, and reporting the latencies as JSON so that runs can be compared across
+# commits (see benchmarks/compare.py)
+# usage: python -m benchmarks.suite [--patients N] [--seed N] [--dataset DATABASE_NAME] [--runs N] [--output results.json]
+import argparse
+import json
+import os
+import platform
+import sqlite3 as sql
+import subprocess
+import sys
+import time
+from datetime import datetime
+from benchmarks import common
+
+database_path = common.use_temporary_database('suite')
+import config
+config.password = 'benchmark'           # the pages are driven through the real login and access checks
+config.edit_mode_password = 'benchmark-edit'
+config.dr_mls_access_code = 'benchmark-dr-mls'
+
+from streamlit.testing.v1 import AppTest
+import database as db
+import instrumentation
+import lookups
+import patient
+import doctor
+import department
+import prescription
+import medical_test
+import pagination
+import rendering
+import repository
+import write_queue
+from benchmarks import dataset
+
+app_path = os.path.join(common.repo_dir, 'hims_app.py')
+page_timeout = 600          # seconds a single rerun of the app may take (counting the records of a large table)
+
+# prefixes of the ids of each table
+table_prefixes = {
+    'department_record': 'D', 'doctor_record': 'DR', 'patient_record': 'P',
+    'prescription_record': 'M', 'medical_test_record': 'T'
+}
+
+# class driving one page of the application (a function of a module) through Streamlit's headless test runner,
+# the same way a user would: logging in, selecting the module and function, and filling in the widgets by label
+class Page:
+
+    def __init__(self, module, function, access_code = None):
+        self.app = AppTest.from_file(app_path, default_timeout = page_timeout)
+        self.app.run()
+        self.widget('text_input', 'Enter password', self.app.sidebar).set_value(config.password)
+        self.app.run()
+        self.widget('selectbox', 'Select module', self.app.sidebar).set_value(module)
+        self.app.run()
+        self.widget('selectbox', 'Select function', self.app.sidebar).set_value(function)
+        self.app.run()
+        if access_code is not None:
+            self.app.sidebar.text_input[1].set_value(access_code)
+            self.app.run()
+        self.check()
+
+    # method to find a widget of the given kind (e.g. 'text_input') by its label
+    def widget(self, kind, label, container = None):
+        for widget in getattr(container or self.app, kind):
+            if widget.label == label:
+                return widget
+        raise LookupError(f'No {kind} labelled {label!r} on the page')
+
+    # method to fill in the widgets with the given labels (text inputs, text areas and number inputs) and rerun the app
+    def fill(self, values):
+        return self.set(values).run()
+
+    # method to fill in the widgets with the given labels without rerunning the app (the values are sent with the next run)
+    def set(self, values):
+        for label, value in values.items():
+            for kind in ('text_input', 'text_area', 'number_input'):
+                try:
+                    self.widget(kind, label).set_value(value)
+                    break
+                except LookupError:
+                    pass
+            else:
+                raise LookupError(f'No input labelled {label!r} on the page')
+        return self
+
+    # method to click the button with the given label (or key) and rerun the app
+    def click(self, label = None, key = None):
+        button = self.app.button(key = key) if key else self.widget('button', label)
+        button.click()
+        return self.run()
+
+    def run(self):
+        self.app.run()
+        return self.check()
+
+    # method to make sure the last run neither raised an exception nor showed an error (which would mean the
+    # benchmark measured the wrong thing)
+    def check(self):
+        if self.app.exception or self.app.error:
+            messages = [exception.value for exception in self.app.exception] + [error.value for error in self.app.error]
+            raise RuntimeError(f'The page failed: {messages}')
+        return self
+
+    # method to get the success messages shown by the last run
+    def successes(self):
+        return [success.value for success in self.app.success]
+
+# function to get an endless cycle through the given ids (so that repeated runs don't just hit cached results)
+def cycle(values):
+    while True:
+        yield from values
+
+# function to time a scenario (the first call is a warm up, which isn't counted)
+def measure(function, runs):
+    function()
+    return common.summarise(common.durations(function, runs))
+
+# function to get the benchmarks of the verify_*_id helpers, keyed by scenario name
+def verify_id_scenarios(data, runs):
+    scenarios = {}
+    for name, verify, prefix in (
+        ('verify_patient_id', patient.verify_patient_id, 'P'),
+        ('verify_doctor_id', doctor.verify_doctor_id, 'DR'),
+        ('verify_department_id', department.verify_department_id, 'D'),
+        ('verify_prescription_id', prescription.verify_prescription_id, 'M'),
+        ('verify_medical_test_id', medical_test.verify_medical_test_id, 'T'),
+    ):
+        existing = cycle(data.sample_ids(prefix, runs + 1))
+        scenarios[name] = measure(lambda: verify(next(existing)), runs)
+    missing = cycle([f'P-{i}-MISSING' for i in range(runs + 1)])
+    scenarios['verify_patient_id_missing'] = measure(lambda: patient.verify_patient_id(next(missing)), runs)
+    return scenarios
+
+# function to get the durations of clicking through the following pages of a table, up to the given number of pages
+# (fewer if the table runs out of pages)
+def page_through(page, table, runs):
+    durations = []
+    while len(durations) < runs and not page.widget('button', 'Next page').disabled:
+        start = time.perf_counter()
+        page.click(key = f'{table}_next_page')
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+# function to rerun a page without reusing the query results cached by earlier runs
+def rerun_uncached(page):
+    rendering.cached_call_result.cache_clear()
+    page.run()
+
+# function to get the benchmarks of the complete records shown a page at a time (the first page and the following
+# pages), and of the query behind a page deep into each table, keyed by scenario name
+def show_all_scenarios(data, runs):
+    scenarios = {}
+    for module, function, table in (
+        ('Patients', 'Show complete patient record', 'patient_record'),
+        ('Doctors', 'Show complete doctor record', 'doctor_record'),
+        ('Departments', 'Show complete department record', 'department_record'),
+    ):
+        name = table.replace('_record', '')
+        page = Page(module, function)
+        scenarios[f'show_all_{name}s_first_page'] = measure(lambda: rerun_uncached(page), runs)
+        durations = page_through(page, table, runs)
+        if durations:
+            scenarios[f'show_all_{name}s_next_page'] = common.summarise(durations)
+    for records in (repository.patients, repository.doctors, repository.departments, repository.prescriptions,
+                    repository.medical_tests):
+        middle = data.sample_ids(table_prefixes[records.table], 1)[0]
+        scenarios[f'fetch_page_{records.table}_deep'] = measure(lambda: records.list(middle, pagination.page_size + 1), runs)
+    return scenarios
+
+# function to get the benchmarks of the listings of a patient's records, keyed by scenario name
+def by_patient_scenarios(data, runs):
+    scenarios = {}
+    for module, function, label, name in (
+        ('Prescriptions', 'Show prescriptions of a particular patient',
+         'Enter Patient ID to get the prescription record of that patient', 'prescriptions_by_patient'),
+        ('Medical Tests', 'Show medical tests of a particular patient',
+         'Enter Patient ID to get the medical test record of that patient', 'medical_tests_by_patient'),
+        ('Patients', 'Show patient timeline', 'Enter Patient ID of the patient whose timeline is to be shown', 'patient_timeline'),
+    ):
+        page = Page(module, function)
+        patients = cycle(data.sample_ids('P', runs + 1))
+        scenarios[name] = measure(lambda: page.fill({ label: next(patients) }), runs)
+    return scenarios
+
+# function to get the benchmarks of the data layer on its own (without the pages), keyed by scenario name
+def repository_scenarios(data, runs):
+    scenarios = {}
+    for name, function, prefix in (
+        ('repository_get_patient', repository.patients.get, 'P'),
+        ('repository_get_doctor', repository.doctors.get, 'DR'),
+        ('repository_get_prescription', repository.prescriptions.get, 'M'),
+        ('repository_get_medical_test', repository.medical_tests.get, 'T'),
+        ('repository_prescriptions_by_patient', repository.prescriptions.list_by_patient, 'P'),
+        ('repository_medical_tests_by_patient', repository.medical_tests.list_by_patient, 'P'),
+    ):
+        values = cycle(data.sample_ids(prefix, runs + 1))
+        scenarios[name] = measure(lambda: function(next(values)), runs)
+    names = cycle(dataset.last_names)
+    scenarios['repository_search_patients'] = measure(lambda: repository.patients.search(next(names)), runs)
+
+    # lookups by id read from the database, and repeated (answered by the lookup cache)
+    for name, records, prefix in (
+        ('patient', repository.patients, 'P'),
+        ('doctor', repository.doctors, 'DR'),
+        ('department', repository.departments, 'D'),
+    ):
+        ids = cycle(data.sample_ids(prefix, runs + 1))
+        scenarios[f'repository_{name}_name_uncached'] = measure(lambda: records.read_name(next(ids)), runs)
+        id = data.sample_ids(prefix, 1)[0]
+        scenarios[f'repository_{name}_name_cached'] = measure(lambda: records.get_name(id), runs)
+        scenarios[f'repository_{name}_exists_cached'] = measure(lambda: records.exists(id), runs)
+    return scenarios
+
+# function to get the benchmarks of the add and update forms (each run saves a record), keyed by scenario name
+def write_scenarios(data, runs):
+    scenarios = {}
+    patient_id, doctor_id, department_id = data.sample_ids('P', 1)[0], data.sample_ids('DR', 1)[0], data.sample_ids('D', 1)[0]
+
+    page = Page('Patients', 'Add patient', config.edit_mode_password)
+    page.fill({
+        'Full name': 'Benchmark Patient', 'Blood group': 'O+ve', 'Contact number': '9000000000',
+        'Weight (in kg)': 70, 'Height (in cm)': 170, 'Address': '1, MG Road',
+        'City': 'Delhi', 'State': 'Delhi', 'PIN code': '110001', "Next of kin's name": 'Benchmark Kin',
+        "Next of kin's relation to patient": 'Mother', "Next of kin's contact number": '9000000001'
+    })
+    # Aadhar numbers are unique, so each new patient gets one unlike any other (see dataset.unique_number)
+    uids = (f'{number:012d}' for number in range(10 ** 12 - 1, 0, -1))
+    scenarios['add_patient'] = measure(lambda: saved(page.set({ 'Aadhar ID / Voter ID': next(uids) }).click('Save')), runs)
+
+    page = Page('Patients', 'Update patient', config.edit_mode_password)
+    page.fill({ 'Enter Patient ID of the patient to be updated': patient_id })
+    page.fill({
+        'Contact number': '9000000002', 'Weight (in kg)': 71, 'Height (in cm)': 171, 'Address': '2, MG Road',
+        'City': 'Delhi', 'State': 'Delhi', 'PIN code': '110002', "Next of kin's name": 'Benchmark Kin',
+        "Next of kin's relation to patient": 'Father', "Next of kin's contact number": '9000000003'
+    })
+    scenarios['update_patient'] = measure(lambda: saved(page.click('Update')), runs)
+
+    page = Page('Doctors', 'Update doctor', config.edit_mode_password)
+    page.fill({ 'Enter Doctor ID of the doctor to be updated': doctor_id })
+    page.fill({ 'Department ID': department_id })
+    page.fill({
+        'Contact number': '9000000004', 'Email ID': 'benchmark@cityhospital.in', 'Qualification': 'MBBS, MD',
+        'Specialisation': 'General Medicine', 'Years of experience': 10, 'Address': '3, MG Road',
+        'City': 'Delhi', 'State': 'Delhi', 'PIN code': '110003'
+    })
+    scenarios['update_doctor'] = measure(lambda: saved(page.click('Update')), runs)
+
+    page = Page('Prescriptions', 'Add prescription', config.dr_mls_access_code)
+    page.fill({ 'Patient ID': patient_id, 'Doctor ID': doctor_id })
+    page.fill({ 'Diagnosis': 'Benchmark diagnosis', 'Number of medicines': 2 })
+    page.fill({
+        'Medicine 1 name': 'Paracetamol 500 mg', 'Medicine 1 dosage and description': '1 tablet after breakfast',
+        'Medicine 2 name': 'Cetirizine 10 mg', 'Medicine 2 dosage and description': '1 tablet at bedtime'
+    })
+    scenarios['add_prescription'] = measure(lambda: saved(page.click('Save')), runs)
+
+    page = Page('Prescriptions', 'Update prescription', config.dr_mls_access_code)
+    page.fill({ 'Enter Prescription ID of the prescription to be updated': data.sample_ids('M', 1)[0] })
+    page.fill({ 'Diagnosis': 'Updated benchmark diagnosis', 'Medicine 1 name': 'Ibuprofen 400 mg' })
+    scenarios['update_prescription'] = measure(lambda: saved(page.click('Update')), runs)
+
+    page = Page('Medical Tests', 'Add medical test', config.dr_mls_access_code)
+    page.fill({ 'Test name': 'Complete blood count', 'Patient ID': patient_id })
+    page.fill({ 'Doctor ID': doctor_id })
+    page.fill({ 'Medical lab scientist ID': 'MLS-1', 'Cost (INR)': 300 })
+    scenarios['add_medical_test'] = measure(lambda: saved(page.click('Save')), runs)
+
+    page = Page('Medical Tests', 'Update medical test', config.dr_mls_access_code)
+    page.fill({ 'Enter Medical Test ID of the medical test to be updated': data.sample_ids('T', 1)[0] })
+    page.fill({ 'Result and diagnosis': 'Within normal limits.' })
+    scenarios['update_medical_test'] = measure(lambda: saved(page.click('Update')), runs)
+    return scenarios
+
+# function to make sure a form run actually saved its record
+def saved(page):
+    if not any('successfully' in message for message in page.successes()):
+        raise RuntimeError(f'The form did not save its record: {page.successes()}')
+
+# function to get the commit the benchmarked code is at (None outside a git checkout)
+def current_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd = common.repo_dir, capture_output = True,
+                              text = True, check = True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+# function to copy a previously generated dataset to the suite's database (so that its writes leave the original alone)
+def copy_dataset(database_name):
+    with open(dataset.description_path(database_name)) as description:
+        described = json.load(description)
+    with sql.connect(database_name + '.db') as source, sql.connect(database_path) as target:
+        source.backup(target)
+    return dataset.Dataset(described['patients'], described['seed'])
+
+def main(arguments):
+    start = time.perf_counter()
+    if arguments.dataset:
+        data = copy_dataset(arguments.dataset)
+        db.db_init()
+    else:
+        data = dataset.generate(db, arguments.patients, arguments.seed)
+    setup_seconds = time.perf_counter() - start
+    instrumentation.reset()
+    lookups.cache.reset_stats()
+    runs = arguments.runs
+    scenarios = {}
+    for group in (verify_id_scenarios, repository_scenarios, show_all_scenarios, by_patient_scenarios, write_scenarios):
+        scenarios.update(group(data, runs))
+        print(f'{group.__name__}: done', file = sys.stderr)
+    results = {
+        'created': datetime.now().isoformat(timespec = 'seconds'),
+        'commit': current_commit(),
+        'python': platform.python_version(), 'sqlite': sql.sqlite_version, 'platform': platform.platform(),
+        'dataset': data.description(), 'setup_seconds': round(setup_seconds, 1),
+        'scenarios': scenarios,
+        'queries': instrumentation.module_stats() if instrumentation.enabled else None,
+        'lookup_cache': lookups.cache.stats(),
+        'write_queue': write_queue.writer.stats(),
+    }
+    output = json.dumps(results, indent = 2)
+    if arguments.output:
+        with open(arguments.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Benchmark the application against a synthetic dataset.')
+    parser.add_argument('--patients', type = int, default = 10000,
+                        help = 'number of patients of the generated dataset (other tables scale with it)')
+    parser.add_argument('--seed', type = int, default = 0, help = 'seed of the generated dataset')
+    parser.add_argument('--dataset', help = 'benchmark a copy of a dataset made by benchmarks.dataset instead of generating one')
+    parser.add_argument('--runs', type = int, default = 30, help = 'number of timed runs of each scenario')
+    parser.add_argument('--output', help = 'file the JSON results are written to (printed if not given)')
+    main(parser.parse_args())
@@ -0,0 +1,121 @@
+# benchmark of the patient timeline query for patients with many prescriptions and medical tests, among many other
+# patients, compared with the previous three separate lookups (patient, prescriptions, medical tests)
+# usage: python -m benchmarks.timeline_benchmark [number_of_events_per_patient ...]
+import sys
+from benchmarks import common
+
+common.use_temporary_database('timeline')
+import database as db
+import timeline
+
+other_patients = 10000          # patients sharing the tables with the benchmarked one, with 10 events each
+
+# function to insert a patient with the given number of prescriptions (each with two medicines) and medical tests
+def add_patient(c, patient_id, events):
+    c.execute(
+        """
+        INSERT INTO patient_record
+        (
+            id, name, gender, date_of_birth, blood_group,
+            contact_number_1, aadhar_or_voter_id, weight, height,
+            address, city, state, pin_code, next_of_kin_name,
+            next_of_kin_relation_to_patient, next_of_kin_contact_number,
+            date_of_registration, time_of_registration
+        )
+        VALUES (:id, 'Name', 'Female', '1990-01-01', 'O+ve', '9000000000', :id,
+                60, 160, 'Address', 'City', 'State', '000000', 'Kin', 'Mother',
+                '9000000001', '2020-01-01', '00:00:00');
+        """,
+        { 'id': patient_id }
+    )
+    prescriptions = [
+        { 'id': f'M-{patient_id}-{i:05d}', 'p_id': patient_id, 'date_time': f'{2020 + i % 5}-01-01 {i % 24:02d}:00' }
+        for i in range(events // 2)
+    ]
+    c.executemany(
+        """
+        INSERT INTO prescription_record (id, patient_id, doctor_id, date_time, diagnosis)
+        VALUES (:id, :p_id, 'DR-0', :date_time, 'Diagnosis');
+        """,
+        prescriptions
+    )
+    c.executemany(
+        """
+        INSERT INTO prescription_item (prescription_id, position, medicine_name, dosage_description)
+        VALUES (:id, :position, 'Medicine', 'Dosage');
+        """,
+        [{ 'id': prescription['id'], 'position': position } for prescription in prescriptions for position in (1, 2)]
+    )
+    c.executemany(
+        """
+        INSERT INTO medical_test_record
+        (id, test_name, patient_id, doctor_id, medical_lab_scientist_id, test_date_time, result_date_time, cost)
+        VALUES (:id, 'Test', :p_id, 'DR-0', 'MLS-0', :date_time, :date_time, 100);
+        """,
+        [
+            { 'id': f'T-{patient_id}-{i:05d}', 'p_id': patient_id, 'date_time': f'{2020 + i % 5}-06-01 {i % 24:02d}:30' }
+            for i in range(events - events // 2)
+        ]
+    )
+
+# function to add the shared department and doctor, and the other patients
+def populate():
+    with db.connection() as (conn, c):
+        with conn:
+            c.execute(
+                """
+                INSERT INTO department_record (id, name, description, contact_number_1, address, email_id)
+                VALUES ('D-0', 'Department', 'Description', '9000000000', 'Address', 'department@example.com');
+                """
+            )
+            c.execute(
+                """
+                INSERT INTO doctor_record
+                (
+                    id, name, gender, date_of_birth, blood_group, department_id,
+                    contact_number_1, aadhar_or_voter_id, email_id,
+                    qualification, specialisation, years_of_experience, address,
+                    city, state, pin_code
+                )
+                VALUES ('DR-0', 'Doctor', 'Male', '1980-01-01', 'A+ve', 'D-0', '9000000000', 'DR-0',
+                        'doctor@example.com', 'MBBS', 'General', 10, 'Address', 'City', 'State', '000000');
+                """
+            )
+            for i in range(other_patients):
+                add_patient(c, f'P-other-{i:06d}', 10)
+
+# function replicating the previous approach (verify and fetch the patient, then their prescriptions and medical tests)
+def separate_lookups(patient_id):
+    with db.connection() as (conn, c):
+        c.execute('SELECT * FROM patient_view WHERE id = :id;', { 'id': patient_id })
+        c.fetchall()
+        c.execute('SELECT * FROM prescription_view WHERE patient_id = :p_id;', { 'p_id': patient_id })
+        c.fetchall()
+        c.execute('SELECT * FROM medical_test_view WHERE patient_id = :p_id;', { 'p_id': patient_id })
+        c.fetchall()
+
+# function to read every page of the given patient's timeline
+def all_pages(patient_id, size):
+    before = None
+    while True:
+        details, events = timeline.fetch_timeline(patient_id, before, size + 1)
+        if len(events) <= size:
+            return
+        before = events[size - 1][0], events[size - 1][2]
+
+def main(sizes):
+    db.db_init()
+    populate()
+    print(f"{'events':>8} {'first page (ms)':>16} {'all pages (ms)':>15} {'separate lookups (ms)':>22}")
+    for size in sizes:
+        patient_id = f'P-{size}'
+        with db.connection() as (conn, c):
+            with conn:
+                add_patient(c, patient_id, size)
+        first = common.time_per_call(lambda: timeline.fetch_timeline(patient_id, None, 51), 50) / 1000
+        pages = common.time_per_call(lambda: all_pages(patient_id, 50), 10) / 1000
+        separate = common.time_per_call(lambda: separate_lookups(patient_id), 50) / 1000
+        print(f'{size:>8} {first:>16.2f} {pages:>15.2f} {separate:>22.2f}')
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or [10, 100, 500, 2000])
@@ -0,0 +1,58 @@
+# benchmark comparing the primary key existence probe used by the verify_*_id helpers with the previous full table scan
+# usage: python -m benchmarks.verify_id_benchmark [number_of_rows ...]
+import sys
+from benchmarks import common
+
+common.use_temporary_database('verify_id')
+import database as db
+
+# function to insert minimal patient records until the table holds the given number of rows
+def populate(size):
+    with db.connection() as (conn, c):
+        with conn:
+            c.execute('SELECT COUNT(*) FROM patient_record;')
+            start = c.fetchone()[0]
+            c.executemany(
+                """
+                INSERT INTO patient_record
+                (
+                    id, name, gender, date_of_birth, blood_group,
+                    contact_number_1, aadhar_or_voter_id, weight, height,
+                    address, city, state, pin_code, next_of_kin_name,
+                    next_of_kin_relation_to_patient, next_of_kin_contact_number,
+                    date_of_registration, time_of_registration
+                )
+                VALUES (?, 'Name', 'Female', '1990-01-01', 'O+ve', '9000000000', ?,
+                        60, 160, 'Address', 'City', 'State', '000000', 'Kin', 'Mother',
+                        '9000000001', '2020-01-01', '00:00:00');
+                """,
+                ((f'P-{i:09d}', f'UID-{i:09d}') for i in range(start, size))
+            )
+
+# function replicating the previous verification approach (fetch every id and compare in Python)
+def verify_by_scan(patient_id):
+    verify = False
+    with db.connection() as (conn, c):
+        with conn:
+            c.execute('SELECT id FROM patient_record;')
+        for id in c.fetchall():
+            if id[0] == patient_id:
+                verify = True
+                break
+        return verify
+
+def main(sizes):
+    db.db_init()
+    print(f"{'rows':>10} {'probe hit (us)':>15} {'probe miss (us)':>16} {'batch of 100 (us)':>18} {'full scan (us)':>15}")
+    for size in sizes:
+        populate(size)
+        existing = f'P-{size // 2:09d}'
+        batch = [f'P-{i:09d}' for i in range(0, size, max(1, size // 100))][:100]
+        hit = common.time_per_call(lambda: db.verify_id('patient_record', existing), 200)
+        miss = common.time_per_call(lambda: db.verify_id('patient_record', 'P-missing'), 200)
+        batched = common.time_per_call(lambda: db.verify_ids('patient_record', batch), 50)
+        scan = common.time_per_call(lambda: verify_by_scan(existing), 3)
+        print(f'{size:>10} {hit:>15.1f} {miss:>16.1f} {batched:>18.1f} {scan:>15.1f}')
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or [1000, 10000, 100000, 1000000])
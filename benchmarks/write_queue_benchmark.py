@@ -0,0 +1,77 @@
+# benchmark of a registration rush: concurrent clerks (threads, as Streamlit sessions are) each adding patients through
+# the repository, comparing one transaction per write with the write queue committing the queued writes in groups
+# usage: python -m benchmarks.write_queue_benchmark [--clerks 1 4 16 64] [--seconds 3] [--synchronous FULL]
+import argparse
+import itertools
+import sys
+import threading
+import time
+from benchmarks import common
+
+parser = argparse.ArgumentParser(description = 'Compare per-write transactions with group commit under concurrent clerks.')
+parser.add_argument('--clerks', type = int, nargs = '+', default = [1, 4, 16, 64], help = 'numbers of concurrent clerks')
+parser.add_argument('--seconds', type = float, default = 3, help = 'duration of each run')
+parser.add_argument('--synchronous', default = 'FULL', help = 'PRAGMA synchronous of the connections (e.g. NORMAL)')
+arguments = parser.parse_args()
+
+common.use_temporary_database('write_queue')
+sys.modules['config'].pragmas = { 'synchronous': arguments.synchronous }
+import database as db
+import repository
+import write_queue
+
+numbers = itertools.count()         # makes the Aadhar IDs (which must be unique) of the patients added
+
+# function to add one patient through the repository
+def add_patient():
+    n = next(numbers)
+    repository.patients.insert({
+        'name': f'Patient {n}', 'gender': 'Female', 'date_of_birth': '1990-01-01', 'blood_group': 'O+ve',
+        'contact_number_1': '9000000000', 'aadhar_or_voter_id': f'{n:012d}', 'weight': 60, 'height': 160,
+        'address': 'Address', 'city': 'City', 'state': 'State', 'pin_code': '000000', 'next_of_kin_name': 'Kin',
+        'next_of_kin_relation_to_patient': 'Mother', 'next_of_kin_contact_number': '9000000001',
+        'date_of_registration': '2020-01-01', 'time_of_registration': '00:00:00'
+    })
+
+# function to run the given number of clerks adding patients for the given number of seconds; returns the number of
+# patients added per second and the latencies of the additions (in milliseconds)
+def rush(clerks, seconds):
+    latencies = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def clerk():
+        own = []
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            add_patient()
+            own.append((time.perf_counter() - start) * 1000)
+        with lock:
+            latencies.extend(own)
+
+    threads = [threading.Thread(target = clerk) for _ in range(clerks)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(latencies) / (time.perf_counter() - start), latencies
+
+def main():
+    db.db_init()
+    print(f"synchronous = {arguments.synchronous}, {arguments.seconds} s per run")
+    print(f"{'clerks':>6} {'mode':<22} {'adds/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} {'mean group':>11}")
+    for clerks in arguments.clerks:
+        for mode, enabled in (('transaction per write', False), ('group commit', True)):
+            write_queue.enabled = enabled
+            groups_before = write_queue.writer.stats()
+            throughput, latencies = rush(clerks, arguments.seconds)
+            statistics = common.summarise(latencies)
+            groups_after = write_queue.writer.stats()
+            groups = groups_after['groups'] - groups_before['groups']
+            mean_group = (groups_after['writes'] - groups_before['writes']) / groups if groups else 1.0
+            print(f"{clerks:>6} {mode:<22} {throughput:>9.0f} {statistics['p50_ms']:>9.2f} "
+                  f"{statistics['p95_ms']:>9.2f} {mean_group:>11.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+# command to export any record table to CSV, JSON Lines or Parquet, streaming the rows in constant memory
+# usage: python bulk_export.py <table> <output.csv|output.jsonl|output.parquet> [--from-date YYYY-MM-DD] [--to-date YYYY-MM-DD]
+#        [--filter column=value ...] [--batch-size N]
+import argparse
+import csv
+import json
+import sys
+import time
+from datetime import date, timedelta
+import database as db
+
+# columns used by the date range filters (stored as YYYY-MM-DD, optionally followed by the time, and indexed)
+date_columns = {
+    'patient_record': 'date_of_registration',
+    'medical_test_record': 'test_date_time',
+}
+
+# function to get the columns of the given table (including the columns calculated on read) as a list of (name, type) tuples
+def get_columns(table):
+    with db.connection() as (conn, c):
+        c.execute(f'PRAGMA table_info({db.record_view(table)});')
+        return [(column[1], column[2] or db.calculated_columns.get(column[1], '')) for column in c.fetchall()]
+
+# function to build the query selecting the rows to be exported (along with its parameters)
+def build_query(table, columns, from_date = None, to_date = None, filters = ()):
+    conditions, parameters, order = [], {}, 'id'
+    if from_date or to_date:
+        if table not in date_columns:
+            raise ValueError(f'{table} has no date column to filter on')
+        column = date_columns[table]
+        order = f'{column}, id'         # read in the order of the date index, so rows stream without being sorted first
+        if from_date:
+            conditions.append(f'{column} >= :from_date')
+            parameters['from_date'] = from_date.isoformat()
+        if to_date:
+            # compared with the following day, so that values with a time on the last day are included
+            conditions.append(f'{column} < :before_date')
+            parameters['before_date'] = (to_date + timedelta(days = 1)).isoformat()
+    names = [name for name, _ in columns]
+    for i, (column, value) in enumerate(filters):
+        if column not in names:
+            raise ValueError(f'{table} has no column named {column}')
+        conditions.append(f'{column} = :filter_{i}')
+        parameters[f'filter_{i}'] = value
+    query = f'SELECT {", ".join(names)} FROM {db.record_view(table)}'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    return query + f' ORDER BY {order};', parameters
+
+# class writing rows to a CSV file
+class CsvWriter:
+
+    def __init__(self, path, columns):
+        self.file = open(path, 'w', newline = '')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _ in columns])
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+# class writing rows to a JSON Lines file (one JSON object per record)
+class JsonLinesWriter:
+
+    def __init__(self, path, columns):
+        self.file = open(path, 'w')
+        self.names = [name for name, _ in columns]
+
+    def write(self, rows):
+        self.file.writelines(json.dumps(dict(zip(self.names, row)), ensure_ascii = False) + '\n' for row in rows)
+
+    def close(self):
+        self.file.close()
+
+# class writing rows to a Parquet file (one row group per batch, so that only one batch is held in memory)
+class ParquetWriter:
+
+    def __init__(self, path, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit('Exporting Parquet files requires the pyarrow package (pip install pyarrow)')
+        self.pa = pa
+        self.schema = pa.schema([(name, pa.int64() if column_type == 'INTEGER' else pa.string()) for name, column_type in columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        columns = list(zip(*rows))
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(column, type = field.type) for column, field in zip(columns, self.schema)],
+            schema = self.schema
+        ))
+
+    def close(self):
+        self.writer.close()
+
+# output formats, by file extension
+writers = {
+    'csv': CsvWriter,
+    'jsonl': JsonLinesWriter,
+    'parquet': ParquetWriter,
+}
+
+# function to stream the selected rows of the given table to the given file, one batch at a time
+def bulk_export(table, path, from_date = None, to_date = None, filters = (), batch_size = 10000):
+    extension = path.rsplit('.', 1)[-1].lower()
+    if extension not in writers:
+        raise ValueError(f'Unsupported output format: .{extension} (use .csv, .jsonl or .parquet)')
+    db.db_init()
+    columns = get_columns(table)
+    query, parameters = build_query(table, columns, from_date, to_date, filters)
+    writer = writers[extension](path, columns)
+    exported = 0
+    start = time.perf_counter()
+    try:
+        with db.connection() as (conn, c):
+            c.arraysize = batch_size
+            c.execute(query, parameters)
+            while True:
+                rows = c.fetchmany()
+                if not rows:
+                    break
+                writer.write(rows)
+                exported += len(rows)
+    finally:
+        writer.close()
+    elapsed = time.perf_counter() - start
+    print(f'Exported {exported} records from {table} to {path} in {elapsed:.1f} s '
+          f'({exported / max(elapsed, 1e-9):,.0f} records/s)')
+    return exported
+
+# function to parse a column=value filter given on the command line
+def parse_filter(text):
+    column, separator, value = text.partition('=')
+    if not separator:
+        raise argparse.ArgumentTypeError('filters must be given as column=value')
+    return column, value
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Export a record table to a CSV, JSON Lines or Parquet file.')
+    parser.add_argument('table', choices = db.record_tables, help = 'table to export')
+    parser.add_argument('path', help = 'output file (.csv, .jsonl or .parquet)')
+    parser.add_argument('--from-date', type = date.fromisoformat,
+                        help = 'earliest date of registration (patients) or test date (medical tests), as YYYY-MM-DD')
+    parser.add_argument('--to-date', type = date.fromisoformat,
+                        help = 'latest date of registration (patients) or test date (medical tests), as YYYY-MM-DD')
+    parser.add_argument('--filter', type = parse_filter, action = 'append', default = [],
+                        help = 'only export records where column=value (can be repeated)')
+    parser.add_argument('--batch-size', type = int, default = 10000, help = 'number of rows fetched and written at a time')
+    arguments = parser.parse_args()
+    try:
+        bulk_export(arguments.table, arguments.path, arguments.from_date, arguments.to_date,
+                    arguments.filter, arguments.batch_size)
+    except ValueError as error:
+        sys.exit(str(error))
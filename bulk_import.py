@@ -0,0 +1,195 @@
+# command to bulk import patient, doctor or department records from large CSV or Parquet files
+# usage: python bulk_import.py {patient,doctor,department} <file.csv|file.parquet> [--chunk-size N] [--rejects <file.csv>]
+import argparse
+import csv
+import itertools
+import os
+import sys
+import time
+from datetime import datetime, date
+import database as db
+import ids
+
+# tables that can be bulk imported, along with the prefix of the ids generated for their records
+importable_tables = {
+    'patient': ('patient_record', 'P'),
+    'doctor': ('doctor_record', 'DR'),
+    'department': ('department_record', 'D'),
+}
+
+# columns filled in by the import itself rather than read from the input file
+derived_columns = {
+    'patient_record': ('id',),
+    'doctor_record': ('id',),
+    'department_record': ('id',),
+}
+
+# function to get the columns of the given table as a list of (name, type, not null) tuples
+def get_columns(table):
+    with db.connection() as (conn, c):
+        c.execute(f'PRAGMA table_info({db.record_table(table)});')
+        return [(column[1], column[2], bool(column[3])) for column in c.fetchall()]
+
+# function to parse a date in the YYYY-MM-DD or DD-MM-YYYY format (faster than datetime.strptime for millions of rows)
+def parse_date(text):
+    first, month, last = text.split('-')
+    if len(first) == 4 and len(month) == 2 and len(last) == 2:
+        return date(int(first), int(month), int(last))
+    if len(first) == 2 and len(month) == 2 and len(last) == 4:
+        return date(int(last), int(month), int(first))
+    raise ValueError(text)
+
+# function to convert a value read from the input file to text (None for missing values)
+def to_text(value):
+    if type(value) is not str:
+        if value is None:
+            return None
+        if isinstance(value, (datetime, date)):
+            return value.strftime('%Y-%m-%d')
+        value = str(value)
+        if value in ('nan', 'NaN', 'None'):
+            return None
+    return value.strip() or None
+
+# class validating the rows of an input file against the schema of a table and inserting them in batches
+class BulkImporter:
+
+    def __init__(self, kind, rejects_path):
+        self.table, self.prefix = importable_tables[kind]
+        self.columns = get_columns(self.table)
+        self.names = [name for name, _, _ in self.columns]
+        self.statement = f"""
+            INSERT INTO {self.table} ({', '.join(self.names)})
+            VALUES ({', '.join(':' + name for name in self.names)});
+            """
+        self.departments = set()
+        if self.table == 'doctor_record':
+            with db.connection() as (conn, c):
+                c.execute('SELECT id FROM department_record;')
+                self.departments = {department[0] for department in c.fetchall()}
+        self.rejects_path = rejects_path
+        self.rejects_file = None
+        self.rejects_writer = None
+        self.imported = 0
+        self.rejected = 0
+
+    # method to validate one input row and build the record to be inserted (raises ValueError for invalid rows)
+    def build_record(self, row, now):
+        record = {}
+        for name, column_type, not_null in self.columns:
+            if name in derived_columns[self.table]:
+                continue
+            value = to_text(row.get(name))
+            if value is None and name == 'date_of_registration':
+                value = now.strftime('%Y-%m-%d')
+            elif value is None and name == 'time_of_registration':
+                value = now.strftime('%H:%M:%S')
+            if value is None:
+                if not_null:
+                    raise ValueError(f'missing value for {name}')
+            elif column_type == 'INTEGER':
+                try:
+                    value = int(float(value))
+                except ValueError:
+                    raise ValueError(f'{name} must be a number')
+            elif name in ('date_of_birth', 'date_of_registration'):
+                try:
+                    value = parse_date(value).isoformat()
+                except ValueError:
+                    raise ValueError(f'{name} must be in YYYY-MM-DD or DD-MM-YYYY format')
+            record[name] = value
+        if self.table == 'doctor_record' and record['department_id'] not in self.departments:
+            raise ValueError('invalid department_id')
+        record['id'] = ids.generate_id(self.prefix)
+        return record
+
+    # method to write a rejected input row (along with the reason) to the rejects file
+    def reject(self, row, error):
+        if self.rejects_writer is None:
+            self.rejects_file = open(self.rejects_path, 'w', newline = '')
+            self.rejects_writer = csv.DictWriter(self.rejects_file, fieldnames = list(row) + ['error'],
+                                                 extrasaction = 'ignore')
+            self.rejects_writer.writeheader()
+        self.rejects_writer.writerow({ **row, 'error': error })
+        self.rejected += 1
+
+    # method to validate and insert one chunk of input rows in a single transaction
+    def import_chunk(self, rows):
+        records, sources = [], []
+        now = datetime.now()
+        for row in rows:
+            try:
+                records.append(self.build_record(row, now))
+                sources.append(row)
+            except ValueError as error:
+                self.reject(row, str(error))
+        with db.connection() as (conn, c):
+            try:
+                with conn:
+                    c.executemany(self.statement, records)
+                self.imported += len(records)
+            except db.sql.IntegrityError:
+                # some rows clash with existing records (e.g. a duplicate Aadhar ID), so this chunk is inserted
+                # row by row inside one transaction, with a savepoint to isolate each failing row
+                with conn:
+                    c.execute('BEGIN;')
+                    for record, row in zip(records, sources):
+                        c.execute('SAVEPOINT row;')
+                        try:
+                            c.execute(self.statement, record)
+                            c.execute('RELEASE row;')
+                            self.imported += 1
+                        except db.sql.IntegrityError as error:
+                            c.execute('ROLLBACK TO row;')
+                            c.execute('RELEASE row;')
+                            self.reject(row, str(error))
+
+    def close(self):
+        if self.rejects_file is not None:
+            self.rejects_file.close()
+
+# function to read the input file in chunks of rows (as dictionaries), without loading the whole file into memory
+def read_chunks(path, chunk_size):
+    if path.lower().endswith('.parquet'):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit('Importing Parquet files requires the pyarrow package (pip install pyarrow)')
+        for batch in pq.ParquetFile(path).iter_batches(batch_size = chunk_size):
+            yield batch.to_pylist()
+    else:
+        with open(path, newline = '') as file:
+            reader = csv.DictReader(file)
+            while True:
+                rows = list(itertools.islice(reader, chunk_size))
+                if not rows:
+                    break
+                yield rows
+
+# function to import all the rows of the given file into the table of the given kind of record
+def bulk_import(kind, path, chunk_size = 10000, rejects_path = None):
+    db.db_init()
+    importer = BulkImporter(kind, rejects_path or os.path.splitext(path)[0] + '.rejected.csv')
+    start = time.perf_counter()
+    try:
+        for rows in read_chunks(path, chunk_size):
+            importer.import_chunk(rows)
+            elapsed = time.perf_counter() - start
+            print(f'{importer.imported} imported, {importer.rejected} rejected '
+                  f'({importer.imported / elapsed:,.0f} records/s)', file = sys.stderr)
+    finally:
+        importer.close()
+    elapsed = time.perf_counter() - start
+    print(f'Imported {importer.imported} {kind} records in {elapsed:.1f} s '
+          f'({importer.imported / max(elapsed, 1e-9):,.0f} records/s), rejected {importer.rejected}'
+          + (f' (see {importer.rejects_path})' if importer.rejected else ''))
+    return importer.imported, importer.rejected
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description = 'Bulk import patient, doctor or department records from a CSV or Parquet file.')
+    parser.add_argument('kind', choices = importable_tables, help = 'kind of records in the file')
+    parser.add_argument('path', help = 'CSV or Parquet file with one column per table column (ids are generated)')
+    parser.add_argument('--chunk-size', type = int, default = 10000, help = 'number of rows read and inserted per transaction')
+    parser.add_argument('--rejects', help = 'CSV file for the rejected rows (default: <file>.rejected.csv)')
+    arguments = parser.parse_args()
+    bulk_import(arguments.kind, arguments.path, arguments.chunk_size, arguments.rejects)
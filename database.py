@@ -1,137 +1,765 @@
 import sqlite3 as sql
+import queue
+import threading
+import time
+from datetime import date
+from contextlib import contextmanager
 import config
+import ids
+import instrumentation
 
-# function to establish connection to the database, enable foreign key constraint support, and create cursor
+# number of idle connections kept open by the connection pool (configurable through config.pool_size)
+pool_size = getattr(config, 'pool_size', 5)
+
+# PRAGMA profile applied to every new connection (any of these can be overridden through config.pragmas)
+# WAL lets readers carry on while a record is being saved, and busy_timeout makes writers wait for the lock instead of failing
+# synchronous FULL syncs the log to disk at every commit, so that a write reported as committed survives a power loss;
+# with the write queue (write_queue.py) each sync is shared by all the writes committed together, otherwise NORMAL is
+# kept, which is safe with WAL but may lose the latest commits on a power loss
+pragmas = {
+    'journal_mode': 'WAL',
+    'synchronous': 'FULL' if getattr(config, 'write_queue', True) else 'NORMAL',
+    'cache_size': -16000,           # negative values are in KiB (i.e. 16 MB of page cache per connection)
+    'mmap_size': 268435456,         # 256 MB of the database file memory-mapped for reads
+    'busy_timeout': 5000,           # in milliseconds
+    'temp_store': 'MEMORY',
+}
+pragmas.update(getattr(config, 'pragmas', {}))
+
+# class implementing a pool of long-lived database connections shared by all the sessions of the application
+class ConnectionPool:
+
+    def __init__(self, database, size):
+        self.database = database
+        self.size = size
+        self.idle = queue.LifoQueue()
+        self.lock = threading.Lock()
+        self.hits = 0           # number of checkouts served by an idle connection
+        self.misses = 0         # number of checkouts that had to open a new connection
+
+    # method to open a new connection to the database, apply the PRAGMA profile and enable foreign key constraint support
+    def connect(self):
+        conn = sql.connect(self.database, check_same_thread = False,
+                           factory = instrumentation.InstrumentedConnection if instrumentation.enabled else sql.Connection)
+        for pragma, value in pragmas.items():
+            conn.execute(f"PRAGMA {pragma} = {value};")
+        conn.execute("PRAGMA foreign_keys = ON;")
+        return conn
+
+    # method to check out a connection (an idle one if available, otherwise a new one)
+    def acquire(self):
+        try:
+            conn = self.idle.get_nowait()
+            with self.lock:
+                self.hits += 1
+        except queue.Empty:
+            conn = self.connect()
+            with self.lock:
+                self.misses += 1
+        return conn
+
+    # method to return a connection to the pool (closing it if the pool is already full)
+    def release(self, conn):
+        if conn.in_transaction:
+            conn.rollback()         # discards any transaction left open by the caller
+        with self.lock:
+            keep = self.idle.qsize() < self.size
+        if keep:
+            self.idle.put(conn)
+        else:
+            conn.close()
+
+    # method to close all the idle connections held by the pool
+    def close_all(self):
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    # method to get the usage counters of the pool
+    def stats(self):
+        with self.lock:
+            return {
+                'size': self.size, 'idle': self.idle.qsize(),
+                'hits': self.hits, 'misses': self.misses
+            }
+
+pool = ConnectionPool(config.database_name + '.db', pool_size)
+
+# number of connection checkouts that changed the database in this process (used to invalidate cached query results)
+generation = 0
+
+# function to check out a pooled connection to the database along with a cursor (released automatically on exit)
+@contextmanager
 def connection():
-    conn = sql.connect(config.database_name + '.db')
-    conn.execute("PRAGMA foreign_keys = ON;")
+    global generation
+    conn = pool.acquire()
+    changes = conn.total_changes
     c = conn.cursor()
-    return conn, c
+    try:
+        yield conn, c
+    finally:
+        c.close()           # also records the last statement of an instrumented cursor
+        if conn.total_changes != changes:
+            generation += 1
+        pool.release(conn)
 
-# function to establish connection to the database and create tables (if they don't exist yet)
-def db_init():
-    conn, c = connection()
-    with conn:
-        c.execute(
-            """
-            CREATE TABLE IF NOT EXISTS patient_record (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                age INTEGER NOT NULL,
-                gender TEXT NOT NULL,
-                date_of_birth TEXT NOT NULL,
-                blood_group TEXT NOT NULL,
-                contact_number_1 TEXT NOT NULL,
-                contact_number_2 TEXT,
-                aadhar_or_voter_id TEXT NOT NULL UNIQUE,
-                weight INTEGER NOT NULL,
-                height INTEGER NOT NULL,
-                address TEXT NOT NULL,
-                city TEXT NOT NULL,
-                state TEXT NOT NULL,
-                pin_code TEXT NOT NULL,
-                next_of_kin_name TEXT NOT NULL,
-                next_of_kin_relation_to_patient TEXT NOT NULL,
-                next_of_kin_contact_number TEXT NOT NULL,
-                email_id TEXT,
-                date_of_registration TEXT NOT NULL,
-                time_of_registration TEXT NOT NULL
-            );
-            """
-        )
-    with conn:
-        c.execute(
-            """
-            CREATE TABLE IF NOT EXISTS doctor_record (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                age INTEGER NOT NULL,
-                gender TEXT NOT NULL,
-                date_of_birth TEXT NOT NULL,
-                blood_group TEXT NOT NULL,
-                department_id TEXT NOT NULL,
-                department_name TEXT NOT NULL,
-                contact_number_1 TEXT NOT NULL,
-                contact_number_2 TEXT,
-                aadhar_or_voter_id TEXT NOT NULL UNIQUE,
-                email_id TEXT NOT NULL UNIQUE,
-                qualification TEXT NOT NULL,
-                specialisation TEXT NOT NULL,
-                years_of_experience INTEGER NOT NULL,
-                address TEXT NOT NULL,
-                city TEXT NOT NULL,
-                state TEXT NOT NULL,
-                pin_code TEXT NOT NULL,
-                FOREIGN KEY (department_id) REFERENCES department_record(id)
-                ON UPDATE CASCADE
-                ON DELETE RESTRICT
-            );
-            """
-        )
-    with conn:
-        c.execute(
-            """
-            CREATE TABLE IF NOT EXISTS department_record (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL UNIQUE,
-                description TEXT NOT NULL,
-                contact_number_1 TEXT NOT NULL,
-                contact_number_2 TEXT,
-                address TEXT NOT NULL,
-                email_id TEXT NOT NULL UNIQUE
-            );
-            """
-        )
-    with conn:
-        c.execute(
-            """
-            CREATE TABLE IF NOT EXISTS prescription_record (
-                id TEXT PRIMARY KEY,
-                patient_id TEXT NOT NULL,
-                patient_name TEXT NOT NULL,
-                doctor_id TEXT NOT NULL,
-                doctor_name TEXT NOT NULL,
-                diagnosis TEXT NOT NULL,
-                comments TEXT,
-                medicine_1_name TEXT NOT NULL,
-                medicine_1_dosage_description TEXT NOT NULL,
-                medicine_2_name TEXT,
-                medicine_2_dosage_description TEXT,
-                medicine_3_name TEXT,
-                medicine_3_dosage_description TEXT,
-                FOREIGN KEY (patient_id) REFERENCES patient_record(id)
-                ON UPDATE CASCADE
-                ON DELETE RESTRICT,
-                FOREIGN KEY (doctor_id) REFERENCES doctor_record(id)
-                ON UPDATE CASCADE
-                ON DELETE RESTRICT
-            );
-            """
+# tables whose records are identified by the 'id' primary key column
+record_tables = ('patient_record', 'doctor_record', 'department_record',
+                 'prescription_record', 'medical_test_record')
+
+# maximum number of ids bound to a single batched verification query
+verify_batch_size = 500
+
+# function to make sure that only known record tables are interpolated into SQLite statements
+def record_table(table):
+    if table not in record_tables:
+        raise ValueError(f'Unknown record table: {table}')
+    return table
+
+# views through which the records of a table are read, adding the columns calculated on read (e.g. the current age)
+record_views = {
+    'patient_record': 'patient_view',
+    'doctor_record': 'doctor_view',
+    'prescription_record': 'prescription_view',
+    'medical_test_record': 'medical_test_view',
+}
+
+# types of the columns calculated by the record views (views don't declare the types of calculated columns)
+calculated_columns = {
+    'age': 'INTEGER',
+}
+
+# function to get the view (or, for tables without calculated columns, the table) to read the records of a table from
+def record_view(table):
+    return record_views.get(record_table(table), table)
+
+# function to verify whether a record with the given id exists in the given table (primary key lookup)
+def verify_id(table, id):
+    with connection() as (conn, c):
+        with conn:
+            c.execute(
+                f"""
+                SELECT EXISTS (
+                    SELECT 1
+                    FROM {record_table(table)}
+                    WHERE id = :id
+                );
+                """,
+                { 'id': id }
+            )
+        return bool(c.fetchone()[0])
+
+# function to find which of the given ids exist in the given table (batched primary key lookups)
+def verify_ids(table, ids):
+    ids = list(dict.fromkeys(ids))
+    verified = set()
+    with connection() as (conn, c):
+        with conn:
+            for i in range(0, len(ids), verify_batch_size):
+                batch = ids[i:i + verify_batch_size]
+                c.execute(
+                    f"""
+                    SELECT id
+                    FROM {record_table(table)}
+                    WHERE id IN ({', '.join('?' * len(batch))});
+                    """,
+                    batch
+                )
+                verified.update(id[0] for id in c.fetchall())
+        return verified
+
+# columns of each record table covered by its full-text search index
+search_columns = {
+    'patient_record': ('name', 'contact_number_1', 'contact_number_2', 'city', 'aadhar_or_voter_id'),
+    'doctor_record': ('name', 'contact_number_1', 'contact_number_2', 'city', 'aadhar_or_voter_id'),
+    'department_record': ('name', 'contact_number_1', 'contact_number_2'),
+}
+
+# function to get the name of the full-text search index of the given record table
+def search_index(table):
+    return table.replace('_record', '_search')
+
+# function to get the statements creating the full-text search index of the given record table (an FTS5 table using
+# the record table as its external content, kept in sync by triggers) and indexing the existing records
+def search_index_statements(table):
+    index = search_index(table)
+    columns = ', '.join(search_columns[table])
+    new_values = ', '.join(f'new.{column}' for column in search_columns[table])
+    old_values = ', '.join(f'old.{column}' for column in search_columns[table])
+    return (
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {index}
+        USING fts5 ({columns}, content = '{table}', content_rowid = 'rowid', prefix = '2 3 4');
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {index} (rowid, {columns}) VALUES (new.rowid, {new_values});
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {index} ({index}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+        END;
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF {columns} ON {table} BEGIN
+            INSERT INTO {index} ({index}, rowid, {columns}) VALUES ('delete', old.rowid, {old_values});
+            INSERT INTO {index} (rowid, {columns}) VALUES (new.rowid, {new_values});
+        END;
+        """,
+        f"INSERT INTO {index} ({index}) VALUES ('rebuild');",
+    )
+
+# function to rebuild the full-text search indexes from the record tables (needed after a VACUUM, which may renumber
+# the rowids the indexes refer to)
+def rebuild_search_indexes():
+    with connection() as (conn, c):
+        with conn:
+            for table in search_columns:
+                index = search_index(table)
+                c.execute(f"INSERT INTO {index} ({index}) VALUES ('rebuild');")
+
+# function to get an SQLite expression converting a legacy DD-MM-YYYY date column to the ISO 8601 YYYY-MM-DD format
+# (values already in the ISO format are left unchanged)
+def iso_date(column):
+    return (f"CASE WHEN substr({column}, 3, 1) = '-' "
+            f"THEN substr({column}, 7, 4) || '-' || substr({column}, 4, 2) || '-' || substr({column}, 1, 2) "
+            f"ELSE {column} END")
+
+# function to get an SQLite expression converting a legacy 'DD-MM-YYYY (hh:mm)' column to the ISO 8601 'YYYY-MM-DD hh:mm' format
+def iso_date_time(column):
+    return (f"CASE WHEN substr({column}, 3, 1) = '-' "
+            f"THEN substr({column}, 7, 4) || '-' || substr({column}, 4, 2) || '-' || substr({column}, 1, 2) "
+            f"|| ' ' || substr({column}, 13, 5) "
+            f"ELSE {column} END")
+
+# function to get an SQLite expression calculating the current age (in completed years) from a date of birth column
+def age_expression(column):
+    dob = iso_date(column)
+    return (f"CAST(strftime('%Y', 'now', 'localtime') AS INTEGER) - CAST(substr({dob}, 1, 4) AS INTEGER) "
+            f"- (strftime('%m-%d', 'now', 'localtime') < substr({dob}, 6, 5))")
+
+# function to get the range of dates of birth of the people whose current age is between the given ages (inclusive),
+# as an (exclusive earliest date, inclusive latest date) tuple of YYYY-MM-DD strings, so that age groups can be looked up
+# with a range scan on an index on the date of birth
+def date_of_birth_range(min_age, max_age, today = None):
+    today = today or date.today()
+    return years_before(today, max_age + 1).isoformat(), years_before(today, min_age).isoformat()
+
+# function to get the date the given number of years before the given date (29 February becomes 28 February if needed)
+def years_before(day, years):
+    try:
+        return day.replace(year = day.year - years)
+    except ValueError:
+        return day.replace(year = day.year - years, day = 28)
+
+# data migrations run in the background, in batches of rows (in rowid order), so that the application stays usable while
+# large tables are converted; the progress of each one is recorded in the background_migration table
+background_migrations = {
+    # ISO 8601 dates and times, which sort as text and so can be served by indexes in date range queries
+    'iso_dates_patient_record': ('patient_record', {
+        'date_of_birth': iso_date('date_of_birth'),
+        'date_of_registration': iso_date('date_of_registration'),
+    }),
+    'iso_dates_doctor_record': ('doctor_record', {
+        'date_of_birth': iso_date('date_of_birth'),
+    }),
+    'iso_dates_medical_test_record': ('medical_test_record', {
+        'test_date_time': iso_date_time('test_date_time'),
+        'result_date_time': iso_date_time('result_date_time'),
+    }),
+}
+
+# number of rows converted per transaction by the background migrations (configurable through config.migration_batch_size)
+migration_batch_size = getattr(config, 'migration_batch_size', 1000)
+
+# function to run the pending background migrations to completion (resuming from the last converted batch)
+def run_background_migrations():
+    with connection() as (conn, c):
+        c.execute('SELECT name, last_rowid FROM background_migration WHERE done = 0 ORDER BY name;')
+        pending = c.fetchall()
+    for name, last_rowid in pending:
+        table, conversions = background_migrations[name]
+        assignments = ', '.join(f'{column} = {expression}' for column, expression in conversions.items())
+        with connection() as (conn, c):
+            c.execute(f'SELECT COALESCE(MAX(rowid), 0) FROM {record_table(table)};')
+            max_rowid = c.fetchone()[0]         # rows added later are already stored in the new format
+        done = False
+        while not done:
+            next_rowid = min(last_rowid + migration_batch_size, max_rowid)
+            done = next_rowid == max_rowid
+            try:
+                with connection() as (conn, c):
+                    with conn:
+                        c.execute(
+                            f"""
+                            UPDATE {table}
+                            SET {assignments}
+                            WHERE rowid > :last_rowid AND rowid <= :next_rowid;
+                            """,
+                            { 'last_rowid': last_rowid, 'next_rowid': next_rowid }
+                        )
+                        c.execute(
+                            """
+                            UPDATE background_migration
+                            SET last_rowid = :next_rowid, done = :done
+                            WHERE name = :name;
+                            """,
+                            { 'next_rowid': next_rowid, 'done': done, 'name': name }
+                        )
+                last_rowid = next_rowid
+            except sql.OperationalError:        # the database stayed locked for longer than busy_timeout
+                done = False
+                time.sleep(1)
+
+# function to start the pending background migrations in a separate thread
+def start_background_migrations():
+    thread = threading.Thread(target = run_background_migrations, name = 'background-migrations', daemon = True)
+    thread.start()
+    return thread
+
+# function to fill in the dates and times of the existing prescriptions from their ids (which record when they were created)
+def backfill_prescription_date_times(c):
+    c.connection.create_function('creation_date_time', 1, ids.creation_date_time, deterministic = True)
+    c.execute(
+        """
+        UPDATE prescription_record
+        SET date_time = creation_date_time(id)
+        WHERE date_time IS NULL;
+        """
+    )
+
+# numbered steps creating and upgrading the database schema; each step is applied once, in order, in its own transaction
+# and the number of the last applied step is recorded in the database file (PRAGMA user_version)
+migrations = {
+    # step 1: tables of the database
+    1: (
+        """
+        CREATE TABLE IF NOT EXISTS patient_record (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            gender TEXT NOT NULL,
+            date_of_birth TEXT NOT NULL,
+            blood_group TEXT NOT NULL,
+            contact_number_1 TEXT NOT NULL,
+            contact_number_2 TEXT,
+            aadhar_or_voter_id TEXT NOT NULL UNIQUE,
+            weight INTEGER NOT NULL,
+            height INTEGER NOT NULL,
+            address TEXT NOT NULL,
+            city TEXT NOT NULL,
+            state TEXT NOT NULL,
+            pin_code TEXT NOT NULL,
+            next_of_kin_name TEXT NOT NULL,
+            next_of_kin_relation_to_patient TEXT NOT NULL,
+            next_of_kin_contact_number TEXT NOT NULL,
+            email_id TEXT,
+            date_of_registration TEXT NOT NULL,
+            time_of_registration TEXT NOT NULL
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS doctor_record (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            age INTEGER NOT NULL,
+            gender TEXT NOT NULL,
+            date_of_birth TEXT NOT NULL,
+            blood_group TEXT NOT NULL,
+            department_id TEXT NOT NULL,
+            department_name TEXT NOT NULL,
+            contact_number_1 TEXT NOT NULL,
+            contact_number_2 TEXT,
+            aadhar_or_voter_id TEXT NOT NULL UNIQUE,
+            email_id TEXT NOT NULL UNIQUE,
+            qualification TEXT NOT NULL,
+            specialisation TEXT NOT NULL,
+            years_of_experience INTEGER NOT NULL,
+            address TEXT NOT NULL,
+            city TEXT NOT NULL,
+            state TEXT NOT NULL,
+            pin_code TEXT NOT NULL,
+            FOREIGN KEY (department_id) REFERENCES department_record(id)
+            ON UPDATE CASCADE
+            ON DELETE RESTRICT
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS department_record (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE,
+            description TEXT NOT NULL,
+            contact_number_1 TEXT NOT NULL,
+            contact_number_2 TEXT,
+            address TEXT NOT NULL,
+            email_id TEXT NOT NULL UNIQUE
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS prescription_record (
+            id TEXT PRIMARY KEY,
+            patient_id TEXT NOT NULL,
+            patient_name TEXT NOT NULL,
+            doctor_id TEXT NOT NULL,
+            doctor_name TEXT NOT NULL,
+            diagnosis TEXT NOT NULL,
+            comments TEXT,
+            medicine_1_name TEXT NOT NULL,
+            medicine_1_dosage_description TEXT NOT NULL,
+            medicine_2_name TEXT,
+            medicine_2_dosage_description TEXT,
+            medicine_3_name TEXT,
+            medicine_3_dosage_description TEXT,
+            FOREIGN KEY (patient_id) REFERENCES patient_record(id)
+            ON UPDATE CASCADE
+            ON DELETE RESTRICT,
+            FOREIGN KEY (doctor_id) REFERENCES doctor_record(id)
+            ON UPDATE CASCADE
+            ON DELETE RESTRICT
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS medical_test_record (
+            id TEXT PRIMARY KEY,
+            test_name TEXT NOT NULL,
+            patient_id TEXT NOT NULL,
+            patient_name TEXT NOT NULL,
+            doctor_id TEXT NOT NULL,
+            doctor_name TEXT NOT NULL,
+            medical_lab_scientist_id TEXT NOT NULL,
+            test_date_time TEXT NOT NULL,
+            result_date_time TEXT NOT NULL,
+            result_and_diagnosis TEXT,
+            description TEXT,
+            comments TEXT,
+            cost INTEGER NOT NULL,
+            FOREIGN KEY (patient_id) REFERENCES patient_record(id)
+            ON UPDATE CASCADE
+            ON DELETE RESTRICT,
+            FOREIGN KEY (doctor_id) REFERENCES doctor_record(id)
+            ON UPDATE CASCADE
+            ON DELETE RESTRICT
+        );
+        """,
+    ),
+    # step 2: indexes on the foreign key columns (used by the per-patient and per-department listings
+    # and by the ON DELETE RESTRICT checks made when deleting a patient, doctor or department)
+    2: (
+        """
+        CREATE INDEX IF NOT EXISTS doctor_record_department_id
+        ON doctor_record (department_id);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS prescription_record_patient_id
+        ON prescription_record (patient_id);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS prescription_record_doctor_id
+        ON prescription_record (doctor_id);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS medical_test_record_patient_id
+        ON medical_test_record (patient_id);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS medical_test_record_doctor_id
+        ON medical_test_record (doctor_id);
+        """,
+    ),
+    # step 3: full-text search indexes on the names, contact numbers, cities and identity numbers
+    3: (
+        search_index_statements('patient_record')
+        + search_index_statements('doctor_record')
+        + search_index_statements('department_record')
+    ),
+    # step 4: ISO 8601 dates (existing rows are converted by the background migrations) and indexes for date range queries
+    4: (
+        """
+        CREATE TABLE IF NOT EXISTS background_migration (
+            name TEXT PRIMARY KEY,
+            last_rowid INTEGER NOT NULL DEFAULT 0,
+            done INTEGER NOT NULL DEFAULT 0
+        );
+        """,
+        """
+        INSERT OR IGNORE INTO background_migration (name)
+        VALUES ('iso_dates_patient_record'), ('iso_dates_doctor_record'), ('iso_dates_medical_test_record');
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS patient_record_date_of_registration
+        ON patient_record (date_of_registration);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS medical_test_record_test_date_time
+        ON medical_test_record (test_date_time);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS medical_test_record_result_date_time
+        ON medical_test_record (result_date_time);
+        """,
+    ),
+    # step 5: ages calculated on read from the date of birth (instead of being stored and going stale on every birthday),
+    # and indexes on the dates of birth for age group queries
+    5: (
+        """
+        ALTER TABLE patient_record
+        DROP COLUMN age;
+        """,
+        """
+        ALTER TABLE doctor_record
+        DROP COLUMN age;
+        """,
+        f"""
+        CREATE VIEW IF NOT EXISTS patient_view AS
+        SELECT id, name, {age_expression('date_of_birth')} AS age, gender, date_of_birth,
+        blood_group, contact_number_1, contact_number_2, aadhar_or_voter_id, weight, height,
+        address, city, state, pin_code, next_of_kin_name, next_of_kin_relation_to_patient,
+        next_of_kin_contact_number, email_id, date_of_registration, time_of_registration
+        FROM patient_record;
+        """,
+        f"""
+        CREATE VIEW IF NOT EXISTS doctor_view AS
+        SELECT id, name, {age_expression('date_of_birth')} AS age, gender, date_of_birth,
+        blood_group, department_id, department_name, contact_number_1, contact_number_2,
+        aadhar_or_voter_id, email_id, qualification, specialisation, years_of_experience,
+        address, city, state, pin_code
+        FROM doctor_record;
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS patient_record_date_of_birth
+        ON patient_record (date_of_birth);
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS doctor_record_date_of_birth
+        ON doctor_record (date_of_birth);
+        """,
+    ),
+    # step 6: medicines of the prescriptions moved to a child table (one row per medicine, any number per prescription,
+    # looked up by medicine name through an index), with the existing medicines copied over in their original order
+    6: (
+        """
+        CREATE TABLE IF NOT EXISTS prescription_item (
+            prescription_id TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            medicine_name TEXT NOT NULL,
+            dosage_description TEXT,
+            PRIMARY KEY (prescription_id, position),
+            FOREIGN KEY (prescription_id) REFERENCES prescription_record(id)
+            ON UPDATE CASCADE
+            ON DELETE CASCADE
+        );
+        """,
+        """
+        INSERT INTO prescription_item (prescription_id, position, medicine_name, dosage_description)
+        SELECT id, 1, medicine_1_name, medicine_1_dosage_description
+        FROM prescription_record
+        UNION ALL
+        SELECT id, 2, medicine_2_name, medicine_2_dosage_description
+        FROM prescription_record
+        WHERE medicine_2_name IS NOT NULL
+        UNION ALL
+        SELECT id, 3, medicine_3_name, medicine_3_dosage_description
+        FROM prescription_record
+        WHERE medicine_3_name IS NOT NULL;
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS prescription_item_medicine_name
+        ON prescription_item (medicine_name COLLATE NOCASE);
+        """,
+    ) + tuple(
+        f"""
+        ALTER TABLE prescription_record
+        DROP COLUMN {column};
+        """
+        for column in ('medicine_1_name', 'medicine_1_dosage_description', 'medicine_2_name',
+                       'medicine_2_dosage_description', 'medicine_3_name', 'medicine_3_dosage_description')
+    ) + (
+        """
+        CREATE VIEW IF NOT EXISTS prescription_view AS
+        SELECT id, patient_id, patient_name, doctor_id, doctor_name, diagnosis, comments,
+        (
+            SELECT group_concat(medicine, '; ')
+            FROM (
+                SELECT medicine_name || COALESCE(' (' || dosage_description || ')', '') AS medicine
+                FROM prescription_item
+                WHERE prescription_id = prescription_record.id
+                ORDER BY position
+            )
+        ) AS medicines
+        FROM prescription_record;
+        """,
+    ),
+    # step 7: names of the patients, doctors and departments no longer copied into the records referring to them
+    # (where they went stale after a rename), but looked up by the views in the query reading the records
+    # (through the primary keys of the referenced tables)
+    7: (
+        """
+        DROP VIEW IF EXISTS doctor_view;
+        """,
+        """
+        DROP VIEW IF EXISTS prescription_view;
+        """,
+    ) + tuple(
+        f"""
+        ALTER TABLE {table}
+        DROP COLUMN {column};
+        """
+        for table, column in (
+            ('doctor_record', 'department_name'),
+            ('prescription_record', 'patient_name'), ('prescription_record', 'doctor_name'),
+            ('medical_test_record', 'patient_name'), ('medical_test_record', 'doctor_name'),
         )
-    with conn:
-        c.execute(
-            """
-            CREATE TABLE IF NOT EXISTS medical_test_record (
-                id TEXT PRIMARY KEY,
-                test_name TEXT NOT NULL,
-                patient_id TEXT NOT NULL,
-                patient_name TEXT NOT NULL,
-                doctor_id TEXT NOT NULL,
-                doctor_name TEXT NOT NULL,
-                medical_lab_scientist_id TEXT NOT NULL,
-                test_date_time TEXT NOT NULL,
-                result_date_time TEXT NOT NULL,
-                result_and_diagnosis TEXT,
-                description TEXT,
-                comments TEXT,
-                cost INTEGER NOT NULL,
-                FOREIGN KEY (patient_id) REFERENCES patient_record(id)
-                ON UPDATE CASCADE
-                ON DELETE RESTRICT,
-                FOREIGN KEY (doctor_id) REFERENCES doctor_record(id)
-                ON UPDATE CASCADE
-                ON DELETE RESTRICT
-            );
-            """
+    ) + (
+        f"""
+        CREATE VIEW IF NOT EXISTS doctor_view AS
+        SELECT doctor.id, doctor.name, {age_expression('doctor.date_of_birth')} AS age, doctor.gender,
+        doctor.date_of_birth, doctor.blood_group, doctor.department_id, department.name AS department_name,
+        doctor.contact_number_1, doctor.contact_number_2, doctor.aadhar_or_voter_id, doctor.email_id,
+        doctor.qualification, doctor.specialisation, doctor.years_of_experience, doctor.address,
+        doctor.city, doctor.state, doctor.pin_code
+        FROM doctor_record AS doctor
+        LEFT JOIN department_record AS department ON department.id = doctor.department_id;
+        """,
+        """
+        CREATE VIEW IF NOT EXISTS prescription_view AS
+        SELECT prescription.id, prescription.patient_id, patient.name AS patient_name,
+        prescription.doctor_id, doctor.name AS doctor_name, prescription.diagnosis, prescription.comments,
+        (
+            SELECT group_concat(medicine, '; ')
+            FROM (
+                SELECT medicine_name || COALESCE(' (' || dosage_description || ')', '') AS medicine
+                FROM prescription_item
+                WHERE prescription_id = prescription.id
+                ORDER BY position
+            )
+        ) AS medicines
+        FROM prescription_record AS prescription
+        LEFT JOIN patient_record AS patient ON patient.id = prescription.patient_id
+        LEFT JOIN doctor_record AS doctor ON doctor.id = prescription.doctor_id;
+        """,
+        """
+        CREATE VIEW IF NOT EXISTS medical_test_view AS
+        SELECT test.id, test.test_name, test.patient_id, patient.name AS patient_name,
+        test.doctor_id, doctor.name AS doctor_name, test.medical_lab_scientist_id, test.test_date_time,
+        test.result_date_time, test.result_and_diagnosis, test.description, test.comments, test.cost
+        FROM medical_test_record AS test
+        LEFT JOIN patient_record AS patient ON patient.id = test.patient_id
+        LEFT JOIN doctor_record AS doctor ON doctor.id = test.doctor_id;
+        """,
+    ),
+    # step 8: dates and times of the prescriptions (filled in from the ids of the existing ones), and indexes serving the
+    # records of a patient in time order (replacing the indexes on the patient ids alone)
+    8: (
+        """
+        ALTER TABLE prescription_record
+        ADD COLUMN date_time TEXT;
+        """,
+        backfill_prescription_date_times,
+        """
+        DROP VIEW IF EXISTS prescription_view;
+        """,
+        """
+        CREATE VIEW IF NOT EXISTS prescription_view AS
+        SELECT prescription.id, prescription.patient_id, patient.name AS patient_name,
+        prescription.doctor_id, doctor.name AS doctor_name, prescription.date_time,
+        prescription.diagnosis, prescription.comments,
+        (
+            SELECT group_concat(medicine, '; ')
+            FROM (
+                SELECT medicine_name || COALESCE(' (' || dosage_description || ')', '') AS medicine
+                FROM prescription_item
+                WHERE prescription_id = prescription.id
+                ORDER BY position
+            )
+        ) AS medicines
+        FROM prescription_record AS prescription
+        LEFT JOIN patient_record AS patient ON patient.id = prescription.patient_id
+        LEFT JOIN doctor_record AS doctor ON doctor.id = prescription.doctor_id;
+        """,
+        """
+        DROP INDEX IF EXISTS prescription_record_patient_id;
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS prescription_record_patient_id_date_time
+        ON prescription_record (patient_id, date_time);
+        """,
+        """
+        DROP INDEX IF EXISTS medical_test_record_patient_id;
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS medical_test_record_patient_id_test_date_time
+        ON medical_test_record (patient_id, test_date_time);
+        """,
+    ),
+    # step 9: indexes on the dates filtered on by the bulk exports extended with the ids, so that the rows of a date range
+    # are read in (date, id) order straight from the index instead of being sorted first (the record tables are keyed
+    # by rowid, so the indexes on the dates alone only keep the rows of the same date in rowid order)
+    9: (
+        """
+        DROP INDEX IF EXISTS patient_record_date_of_registration;
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS patient_record_date_of_registration_id
+        ON patient_record (date_of_registration, id);
+        """,
+        """
+        DROP INDEX IF EXISTS medical_test_record_test_date_time;
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS medical_test_record_test_date_time_id
+        ON medical_test_record (test_date_time, id);
+        """,
+    ),
+}
+
+# version of the database schema expected by the application
+schema_version = max(migrations)
+
+# function to get the version of the schema recorded in the database file
+def get_schema_version(c):
+    c.execute('PRAGMA user_version;')
+    return c.fetchone()[0]
+
+# oldest SQLite version able to run the migration steps (steps 5 to 7 use ALTER TABLE ... DROP COLUMN)
+minimum_sqlite_version = (3, 35, 0)
+
+# function to apply (in order) every migration step newer than the version recorded in the database file
+def migrate(conn, c):
+    version = get_schema_version(c)
+    if version > schema_version:
+        raise sql.DatabaseError(f'Database schema version {version} is newer than this application supports ({schema_version})')
+    if version < schema_version and sql.sqlite_version_info < minimum_sqlite_version:
+        raise sql.NotSupportedError(
+            f"SQLite {sql.sqlite_version} is too old to upgrade the database (SQLite "
+            f"{'.'.join(map(str, minimum_sqlite_version))} or a higher version is required)"
         )
-    conn.close()
+    for step in sorted(migrations):
+        if step > version:
+            with conn:
+                c.execute('BEGIN IMMEDIATE;')       # applies the statements of this step and records it atomically
+                if get_schema_version(c) < step:    # another process may have applied it in the meantime
+                    for statement in migrations[step]:
+                        if callable(statement):
+                            statement(c)
+                        else:
+                            c.execute(statement)
+                    c.execute(f'PRAGMA user_version = {step};')
+    return get_schema_version(c)
+
+schema_lock = threading.Lock()
+schema_ready = False        # set once the schema has been checked by this process
+
+# function to create or upgrade the schema of the database (once per process, skipped if the database file is already up to date)
+def db_init():
+    global schema_ready
+    if schema_ready:
+        return
+    with schema_lock:
+        if not schema_ready:
+            with connection() as (conn, c):
+                migrate(conn, c)
+            start_background_migrations()
+            schema_ready = True
@@ -1,10 +1,6 @@
+# the domain modules (and pandas, which they use to show records) are imported by the functions of their menus, so that
+# only the streamlit import is paid before the password is checked and each module loads when its menu is first selected
 import streamlit as st
-import database as db
-from patient import Patient
-from department import Department
-from doctor import Doctor
-from prescription import Prescription
-from medical_test import Medical_Test
 import config
 import sqlite3 as sql
 
@@ -35,8 +31,10 @@ def verify_dr_mls_access_code():
 # function to perform various operations of the patient module (according to user's selection)
 def patients():
     st.header('PATIENTS')
-    option_list = ['', 'Add patient', 'Update patient', 'Delete patient', 'Show complete patient record', 'Search patient']
+    option_list = ['', 'Add patient', 'Update patient', 'Delete patient', 'Show complete patient record', 'Search patient',
+                   'Show patients of an age group', 'Show patient timeline']
     option = st.sidebar.selectbox('Select function', option_list)
+    from patient import Patient
     p = Patient()
     if (option == option_list[1] or option == option_list[2] or option == option_list[3]) and verify_edit_mode_password():
         if option == option_list[1]:
@@ -57,12 +55,19 @@ def patients():
     elif option == option_list[5]:
         st.subheader('SEARCH PATIENT')
         p.search_patient()
+    elif option == option_list[6]:
+        st.subheader('PATIENTS OF AN AGE GROUP')
+        p.show_patients_by_age_group()
+    elif option == option_list[7]:
+        st.subheader('PATIENT TIMELINE')
+        p.show_patient_timeline()
 
 # function to perform various operations of the doctor module (according to user's selection)
 def doctors():
     st.header('DOCTORS')
     option_list = ['', 'Add doctor', 'Update doctor', 'Delete doctor', 'Show complete doctor record', 'Search doctor']
     option = st.sidebar.selectbox('Select function', option_list)
+    from doctor import Doctor
     dr = Doctor()
     if (option == option_list[1] or option == option_list[2] or option == option_list[3]) and verify_edit_mode_password():
         if option == option_list[1]:
@@ -87,8 +92,10 @@ def doctors():
 # function to perform various operations of the prescription module (according to user's selection)
 def prescriptions():
     st.header('PRESCRIPTIONS')
-    option_list = ['', 'Add prescription', 'Update prescription', 'Delete prescription', 'Show prescriptions of a particular patient']
+    option_list = ['', 'Add prescription', 'Update prescription', 'Delete prescription', 'Show prescriptions of a particular patient',
+                   'Show prescriptions of a particular medicine']
     option = st.sidebar.selectbox('Select function', option_list)
+    from prescription import Prescription
     m = Prescription()
     if (option == option_list[1] or option == option_list[2] or option == option_list[3]) and verify_dr_mls_access_code():
         if option == option_list[1]:
@@ -103,12 +110,16 @@ def prescriptions():
     elif option == option_list[4]:
         st.subheader('PRESCRIPTIONS OF A PARTICULAR PATIENT')
         m.prescriptions_by_patient()
+    elif option == option_list[5]:
+        st.subheader('PRESCRIPTIONS OF A PARTICULAR MEDICINE')
+        m.prescriptions_by_medicine()
 
 # function to perform various operations of the medical_test module (according to user's selection)
 def medical_tests():
     st.header('MEDICAL TESTS')
     option_list = ['', 'Add medical test', 'Update medical test', 'Delete medical test', 'Show medical tests of a particular patient']
     option = st.sidebar.selectbox('Select function', option_list)
+    from medical_test import Medical_Test
     t = Medical_Test()
     if (option == option_list[1] or option == option_list[2] or option == option_list[3]) and verify_dr_mls_access_code():
         if option == option_list[1]:
@@ -129,6 +140,7 @@ def departments():
     st.header('DEPARTMENTS')
     option_list = ['', 'Add department', 'Update department', 'Delete department', 'Show complete department record', 'Search department', 'Show doctors of a particular department']
     option = st.sidebar.selectbox('Select function', option_list)
+    from department import Department
     d = Department()
     if (option == option_list[1] or option == option_list[2] or option == option_list[3]) and verify_edit_mode_password():
         if option == option_list[1]:
@@ -155,7 +167,8 @@ def departments():
 
 # function to implement and initialise home/main menu on successful user authentication
 def home():
-    db.db_init()        # establishes connection to the database and create tables (if they don't exist yet)
+    import database as db
+    db.db_init()        # creates the tables of the database (only on the first run of this process)
     option = st.sidebar.selectbox('Select module', ['', 'Patients', 'Doctors', 'Prescriptions', 'Medical Tests', 'Departments'])
     if option == 'Patients':
         patients()
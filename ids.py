@@ -0,0 +1,86 @@
+import os
+import threading
+import time
+
+# digits used to encode the parts of an id (base 36, fixed width, so that ids sort in time order as plain text)
+digits = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+time_width = 9              # milliseconds since the Unix epoch (enough until the year 5188)
+pid_width = 3               # process id (the first digits of the node)
+node_width = 8              # process id followed by random digits drawn when the process starts (and after a fork), so
+                            # that processes don't share a node even where they get the same process id (e.g. containers)
+sequence_width = 3          # counter within a millisecond (46656 ids per millisecond per process)
+max_sequence = len(digits) ** sequence_width
+
+# function to encode a non-negative number as a fixed width base 36 string
+def encode(number, width):
+    text = ''
+    for _ in range(width):
+        number, digit = divmod(number, len(digits))
+        text = digits[digit] + text
+    return text
+
+# function to decode a fixed width base 36 string back into a number
+def decode(text):
+    number = 0
+    for digit in text:
+        number = number * len(digits) + digits.index(digit)
+    return number
+
+# function to get the local date and time (as YYYY-MM-DD hh:mm) at which a record was created from its id, for the ids
+# generated here as well as the <prefix>-<ssmmhh>-<yymmdd> ids generated by older versions (None if it can't be read)
+def creation_date_time(id):
+    parts = id.split('-')
+    try:
+        if len(parts) == 3 and len(parts[1]) == time_width:
+            return time.strftime('%Y-%m-%d %H:%M', time.localtime(decode(parts[1]) / 1000))
+        if len(parts) == 3 and len(parts[1]) == 6 and len(parts[2]) == 6 and (parts[1] + parts[2]).isdigit():
+            minutes, hours = parts[1][2:4], parts[1][4:6]
+            year, month, day = parts[2][0:2], parts[2][2:4], parts[2][4:6]
+            return f'20{year}-{month}-{day} {hours}:{minutes}'
+    except ValueError:
+        pass
+    return None
+
+# function to get a new node for the process with the given process id
+def new_node(pid):
+    random_digits = int.from_bytes(os.urandom(8), 'big') % len(digits) ** (node_width - pid_width)
+    return encode(pid % len(digits) ** pid_width, pid_width) + encode(random_digits, node_width - pid_width)
+
+# class generating unique, roughly time-ordered ids of the form <prefix>-<time>-<node><sequence>
+class IdGenerator:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pid = None
+        self.node = str()
+        self.last_millisecond = 0
+        self.encoded_millisecond = str()
+        self.sequence = 0
+
+    # method to generate a new id with the given prefix
+    def generate(self, prefix):
+        with self.lock:
+            pid = os.getpid()
+            if pid != self.pid:         # recomputed after a fork so that a child process gets its own node
+                self.pid = pid
+                self.node = new_node(pid)
+                self.last_millisecond = 0
+            millisecond = max(time.time_ns() // 1_000_000, self.last_millisecond)     # never goes back with the clock
+            if millisecond == self.last_millisecond:
+                self.sequence += 1
+                while self.sequence == max_sequence:        # counter exhausted, waits for the next millisecond
+                    millisecond = time.time_ns() // 1_000_000
+                    if millisecond > self.last_millisecond:
+                        self.sequence = 0
+            else:
+                self.sequence = 0
+            if millisecond != self.last_millisecond:
+                self.last_millisecond = millisecond
+                self.encoded_millisecond = encode(millisecond, time_width)
+            return f'{prefix}-{self.encoded_millisecond}-{self.node}{encode(self.sequence, sequence_width)}'
+
+generator = IdGenerator()
+
+# function to generate a new unique id with the given prefix (e.g. 'P' for patients)
+def generate_id(prefix):
+    return generator.generate(prefix)
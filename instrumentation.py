@@ -0,0 +1,208 @@
+import sqlite3 as sql
+import sys
+import time
+import json
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import config
+
+# whether the execution of every SQLite statement is timed and recorded (configurable through config.query_instrumentation)
+enabled = getattr(config, 'query_instrumentation', True)
+
+# statements taking longer than this (in milliseconds) are written to the slow query log
+# (configurable through config.slow_query_threshold)
+slow_query_threshold = getattr(config, 'slow_query_threshold', 100)
+
+# file the slow queries are written to, one JSON object per line (configurable through config.slow_query_log)
+slow_query_log = getattr(config, 'slow_query_log', config.database_name + '_slow_queries.jsonl')
+
+# whether the query plan of each slow query is captured along with it (configurable through config.explain_slow_queries)
+explain_slow_queries = getattr(config, 'explain_slow_queries', False)
+
+# upper bounds (in milliseconds) of the buckets of the latency histograms (the last bucket holds anything slower)
+histogram_bounds = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# modules skipped when looking for the code that issued a statement (they only pass statements on, e.g. the data
+# layer running the statements of the pages)
+skipped_modules = {
+    __name__, 'database', 'rendering', 'pagination', 'repository', 'records', 'lookups', 'snapshot', 'write_queue',
+    'contextlib', 'functools'
+}
+
+# modules running the functions of the threads they start (statements issued by such a thread, e.g. a worker of
+# async_repository, are attributed to the function the thread runs)
+thread_modules = {'threading', 'concurrent.futures.thread'}
+
+lock = threading.Lock()
+sites = {}          # statistics of the statements issued by each module and function, keyed by (module, function)
+local = threading.local()       # site the current thread runs statements for, if set by issued_by
+
+# function to find the module and function (or method) that issued the statement being executed, starting from the
+# given frame (by default, the caller of the cursor method executing the statement)
+def calling_site(frame = None):
+    frame = frame or sys._getframe(2)
+    issuer = frame
+    while frame is not None and frame.f_globals.get('__name__') in skipped_modules:
+        issuer = frame
+        frame = frame.f_back
+    if frame is None or frame.f_globals.get('__name__') in thread_modules:
+        frame = issuer
+    code = frame.f_code
+    return frame.f_globals.get('__name__', 'unknown'), getattr(code, 'co_qualname', code.co_name)
+
+# function to attribute the statements executed by the current thread to the given site meanwhile (e.g. the writes
+# run by the writer thread of write_queue on behalf of the code that queued them)
+@contextmanager
+def issued_by(site):
+    previous = getattr(local, 'site', None)
+    local.site = site
+    try:
+        yield
+    finally:
+        local.site = previous
+
+# function to add one executed statement to the statistics of the site that issued it
+def record(site, milliseconds, rows):
+    bucket = 0
+    while bucket < len(histogram_bounds) and milliseconds > histogram_bounds[bucket]:
+        bucket += 1
+    with lock:
+        statistics = sites.get(site)
+        if statistics is None:
+            statistics = sites[site] = {
+                'statements': 0, 'rows': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'histogram': [0] * (len(histogram_bounds) + 1)
+            }
+        statistics['statements'] += 1
+        statistics['rows'] += rows
+        statistics['total_ms'] += milliseconds
+        statistics['max_ms'] = max(statistics['max_ms'], milliseconds)
+        statistics['histogram'][bucket] += 1
+
+# function to write a slow statement to the slow query log (the parameters are left out, as they hold patient data)
+def log_slow_query(site, query, milliseconds, rows, plan):
+    entry = {
+        'time': datetime.now().isoformat(timespec = 'milliseconds'),
+        'module': site[0], 'function': site[1],
+        'duration_ms': round(milliseconds, 3), 'rows': rows,
+        'query': ' '.join(query.split()),
+    }
+    if plan is not None:
+        entry['plan'] = plan
+        entry['full_scan'] = any(step.startswith('SCAN ') and not step.startswith('SCAN (') for step in plan)
+    with lock:
+        with open(slow_query_log, 'a') as log:
+            log.write(json.dumps(entry) + '\n')
+
+# function to get a copy of the statistics of every site, keyed by 'module.function'
+def stats():
+    with lock:
+        return {
+            f'{module}.{function}': { **statistics, 'histogram': list(statistics['histogram']) }
+            for (module, function), statistics in sites.items()
+        }
+
+# function to get the statistics added up for each module
+def module_stats():
+    totals = {}
+    with lock:
+        for (module, _), statistics in sites.items():
+            total = totals.setdefault(module, {
+                'statements': 0, 'rows': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                'histogram': [0] * (len(histogram_bounds) + 1)
+            })
+            total['statements'] += statistics['statements']
+            total['rows'] += statistics['rows']
+            total['total_ms'] += statistics['total_ms']
+            total['max_ms'] = max(total['max_ms'], statistics['max_ms'])
+            total['histogram'] = [a + b for a, b in zip(total['histogram'], statistics['histogram'])]
+    return totals
+
+# function to clear the statistics collected so far
+def reset():
+    with lock:
+        sites.clear()
+
+# class of the cursors of instrumented connections, timing each statement (including the fetching of its rows)
+# and recording it once the next statement is executed or the cursor is closed
+class InstrumentedCursor(sql.Cursor):
+
+    def __init__(self, *arguments):
+        super().__init__(*arguments)
+        self.query = None
+
+    # method to start timing a new statement (recording the previous one)
+    def begin(self, query, parameters):
+        self.finish()
+        self.query = query
+        self.parameters = parameters
+        self.site = getattr(local, 'site', None) or calling_site()
+        self.elapsed = 0.0
+        self.rows = 0
+
+    # method to record the current statement, if any
+    def finish(self):
+        if self.query is None:
+            return
+        query, self.query = self.query, None
+        milliseconds = self.elapsed * 1000
+        rows = self.rows or max(self.rowcount, 0)
+        record(self.site, milliseconds, rows)
+        if milliseconds >= slow_query_threshold:
+            plan = None
+            if explain_slow_queries and self.parameters is not None:
+                try:
+                    plan = [step[3] for step in self.connection.cursor(sql.Cursor).execute(
+                        'EXPLAIN QUERY PLAN ' + query, self.parameters
+                    ).fetchall()]
+                except sql.Error:       # e.g. statements that can't be explained
+                    pass
+            log_slow_query(self.site, query, milliseconds, rows, plan)
+
+    def execute(self, query, parameters = ()):
+        self.begin(query, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(query, parameters)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def executemany(self, query, parameters):
+        self.begin(query, None)         # plans of batched statements are not captured
+        start = time.perf_counter()
+        try:
+            return super().executemany(query, parameters)
+        finally:
+            self.elapsed += time.perf_counter() - start
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self.elapsed += time.perf_counter() - start
+        self.rows += row is not None
+        return row
+
+    def fetchmany(self, size = None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self.elapsed += time.perf_counter() - start
+        self.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self.elapsed += time.perf_counter() - start
+        self.rows += len(rows)
+        return rows
+
+    def close(self):
+        self.finish()
+        super().close()
+
+# class of instrumented connections (whose cursors are instrumented cursors)
+class InstrumentedConnection(sql.Connection):
+
+    def cursor(self, factory = InstrumentedCursor):
+        return super().cursor(factory)
@@ -0,0 +1,105 @@
+import threading
+import time
+from collections import OrderedDict
+import config
+
+# maximum number of lookups kept in memory (configurable through config.lookup_cache_size)
+cache_size = getattr(config, 'lookup_cache_size', 4096)
+
+# number of seconds for which a cached lookup is reused (configurable through config.lookup_cache_ttl); changes made
+# through the repositories of this process update the cache straight away, this only bounds how long changes made by
+# other processes go unseen
+cache_ttl = getattr(config, 'lookup_cache_ttl', 300)
+
+# class keeping the results of small lookups by id (e.g. whether a record exists, or its name) shared by all the
+# sessions of the process, dropping the least recently used ones once full and the ones older than the time to live
+class LookupCache:
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()        # (value, time stored) keyed by lookup, least recently used first
+        self.lock = threading.Lock()
+        self.hits = 0               # number of lookups answered from the cache
+        self.misses = 0             # number of lookups that had to be loaded
+        self.expirations = 0        # number of entries dropped as they were older than the time to live
+        self.evictions = 0          # number of entries dropped to make room for newer ones
+        self.invalidations = 0      # number of entries dropped as the records they were about changed
+        self.discarded = 0          # number of loaded results not stored as the cache was written to while loading
+        self.version = 0            # number of writes to the cache (stores and invalidations)
+
+    # method to get the result of a lookup, calling load to get it if it isn't cached (results that are None, e.g. of
+    # ids that don't exist yet, are not cached, so that records added by other processes are seen straight away)
+    def get(self, key, load):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if time.monotonic() - entry[1] < self.ttl:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self.entries[key]
+                self.expirations += 1
+            self.misses += 1
+            version = self.version
+        value = load()
+        if value is not None:
+            self.store(key, value, version)
+        return value
+
+    # method to store the result of a lookup loaded from the database when the cache was at the given version; it is
+    # dropped if the cache was written to meanwhile, as the record may have been updated or deleted after it was read
+    def store(self, key, value, version):
+        with self.lock:
+            if self.version == version:
+                self.add_entry(key, value)
+            else:
+                self.discarded += 1
+
+    # method to store the result of a lookup (e.g. refreshed after a write)
+    def set(self, key, value):
+        with self.lock:
+            self.version += 1
+            self.add_entry(key, value)
+
+    # method to add an entry, dropping the least recently used ones if the cache is full (the lock must be held)
+    def add_entry(self, key, value):
+        self.entries[key] = (value, time.monotonic())
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.size:
+            self.entries.popitem(last = False)
+            self.evictions += 1
+
+    # method to drop the results of the given lookups (e.g. about a deleted record)
+    def invalidate(self, *keys):
+        with self.lock:
+            self.version += 1
+            for key in keys:
+                if self.entries.pop(key, None) is not None:
+                    self.invalidations += 1
+
+    # method to drop all the cached lookups
+    def clear(self):
+        with self.lock:
+            self.version += 1
+            self.invalidations += len(self.entries)
+            self.entries.clear()
+
+    # method to get the usage counters of the cache
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': self.size, 'entries': len(self.entries), 'ttl_s': self.ttl,
+                'hits': self.hits, 'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'expirations': self.expirations, 'evictions': self.evictions, 'invalidations': self.invalidations,
+                'discarded': self.discarded
+            }
+
+    # method to reset the usage counters of the cache (e.g. between benchmark runs)
+    def reset_stats(self):
+        with self.lock:
+            self.hits = self.misses = self.expirations = self.evictions = self.invalidations = self.discarded = 0
+
+cache = LookupCache(cache_size, cache_ttl)
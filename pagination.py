@@ -0,0 +1,50 @@
+import streamlit as st
+import rendering
+import config
+
+# default number of records shown per page (configurable through config.page_size)
+page_size = getattr(config, 'page_size', 50)
+page_size_options = sorted({10, 25, 50, 100, 250, page_size})
+
+# function to go to the next page (remembering the id of the last record shown, where the next page starts)
+def next_page(key, last_id):
+    st.session_state[key].append(last_id)
+
+# function to go back to the previous page
+def previous_page(key):
+    st.session_state[key].pop()
+
+# function to start again from the first page (e.g. when the page size changes)
+def first_page(key):
+    st.session_state[key] = [None]
+
+# function to show the records of a table one page at a time (read through the given repository),
+# using the given function to show each page
+def show_paginated_records(repository, show_details):
+    table = repository.table
+    key = f'{table}_page_starts'        # ids after which each visited page starts (None for the first page)
+    if key not in st.session_state:
+        first_page(key)
+    size = st.selectbox('Records per page', page_size_options,
+                        index = page_size_options.index(page_size),
+                        key = f'{table}_page_size', on_change = first_page, args = (key,))
+    total = rendering.cached_call(repository.count)
+    page_starts = st.session_state[key]
+    records = rendering.cached_call(repository.list, page_starts[-1], size + 1)     # one extra record tells if there is a next page
+    if len(records) == 0 and len(page_starts) > 1:      # the page is empty as records were deleted meanwhile
+        first_page(key)
+        page_starts = st.session_state[key]
+        records = rendering.cached_call(repository.list, None, size + 1)
+    has_next_page = len(records) > size
+    records = records[:size]
+    if len(records) > 0:
+        first = (len(page_starts) - 1) * size + 1
+        st.write(f'Showing records {first} to {first + len(records) - 1} of {total}')
+    show_details(records)
+    previous_column, next_column = st.columns(2)
+    previous_column.button('Previous page', key = f'{table}_previous_page',
+                           disabled = len(page_starts) == 1,
+                           on_click = previous_page, args = (key,))
+    next_column.button('Next page', key = f'{table}_next_page',
+                       disabled = not has_next_page,
+                       on_click = next_page, args = (key, records[-1][0] if records else None))
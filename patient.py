@@ -1,167 +1,85 @@
 import streamlit as st
-from datetime import datetime, date
-import database as db
-import pandas as pd
+from datetime import datetime
+import pagination
+import rendering
+import repository
+import timeline
 
 # function to verify patient id
 def verify_patient_id(patient_id):
-    verify = False
-    conn, c = db.connection()
-    with conn:
-        c.execute(
-            """
-            SELECT id
-            FROM patient_record;
-            """
-        )
-    for id in c.fetchall():
-        if id[0] == patient_id:
-            verify = True
-            break
-    conn.close()
-    return verify
-
-# function to generate unique patient id using current date and time
-def generate_patient_id(reg_date, reg_time):
-    id_1 = ''.join(reg_time.split(':')[::-1])
-    id_2 = ''.join(reg_date.split('-')[::-1])[2:]
-    id = f'P-{id_1}-{id_2}'
-    return id
-
-# function to calculate age using given date of birth
-def calculate_age(dob):
-    today = date.today()
-    age = today.year - dob.year - ((dob.month, dob.day) > (today.month, today.day))
-    return age
+    return repository.patients.exists(patient_id)
+
+# titles of the columns of the patients' table (in the order of the columns)
+patient_titles = {
+    'id': 'Patient ID', 'name': 'Name', 'age': 'Age', 'gender': 'Gender',
+    'date_of_birth': 'Date of birth (YYYY-MM-DD)', 'blood_group': 'Blood group',
+    'contact_number_1': 'Contact number', 'contact_number_2': 'Alternate contact number',
+    'aadhar_or_voter_id': 'Aadhar ID / Voter ID', 'weight': 'Weight (kg)',
+    'height': 'Height (cm)', 'address': 'Address', 'city': 'City', 'state': 'State',
+    'pin_code': 'PIN code', 'next_of_kin_name': "Next of kin's name",
+    'next_of_kin_relation_to_patient': "Next of kin's relation to patient",
+    'next_of_kin_contact_number': "Next of kin's contact number", 'email_id': 'Email ID',
+    'date_of_registration': 'Date of registration (YYYY-MM-DD)',
+    'time_of_registration': 'Time of registration (hh:mm:ss)'
+}
+
+# maximum number of patients of an age group shown at a time
+age_group_limit = 100
 
 # function to show the details of patient(s) given in a list (provided as a parameter)
 def show_patient_details(list_of_patients):
-    patient_titles = ['Patient ID', 'Name', 'Age', 'Gender', 'Date of birth (DD-MM-YYYY)',
-                     'Blood group', 'Contact number', 'Alternate contact number',
-                     'Aadhar ID / Voter ID', 'Weight (kg)', 'Height (cm)', 'Address',
-                     'City', 'State', 'PIN code', "Next of kin's name",
-                     "Next of kin's relation to patient",
-                     "Next of kin's contact number", 'Email ID',
-                     'Date of registration (DD-MM-YYYY)', 'Time of registration (hh:mm:ss)']
-    if len(list_of_patients) == 0:
-        st.warning('No data to show')
-    elif len(list_of_patients) == 1:
-        patient_details = [x for x in list_of_patients[0]]
-        series = pd.Series(data = patient_details, index = patient_titles)
-        st.write(series)
-    else:
-        patient_details = []
-        for patient in list_of_patients:
-            patient_details.append([x for x in patient])
-        df = pd.DataFrame(data = patient_details, columns = patient_titles)
-        st.write(df)
+    rendering.show_records(list_of_patients, patient_titles)
+
+# function to show the details of the patient with the given patient id
+def show_patient(patient_id):
+    rendering.show_call(patient_titles, repository.patients.get, patient_id)
 
 # class containing all the fields and methods required to work with the patients' table in the database
 class Patient:
 
-    def __init__(self):
-        self.name = str()
-        self.id = str()
-        self.gender = str()
-        self.age = int()
-        self.contact_number_1 = str()
-        self.contact_number_2 = str()
-        self.date_of_birth = str()
-        self.blood_group = str()
-        self.date_of_registration = str()
-        self.time_of_registration = str()
-        self.email_id = str()
-        self.aadhar_or_voter_id = str()
-        self.height = int()
-        self.weight = int()
-        self.next_of_kin_name = str()
-        self.next_of_kin_relation_to_patient = str()
-        self.next_of_kin_contact_number = str()
-        self.address = str()
-        self.city = str()
-        self.state = str()
-        self.pin_code = str()
+    __slots__ = ()
 
     # method to add a new patient record to the database
     def add_patient(self):
+        values = {}
         st.write('Enter patient details:')
-        self.name = st.text_input('Full name')
+        values['name'] = st.text_input('Full name')
         gender = st.radio('Gender', ['Female', 'Male', 'Other'])
         if gender == 'Other':
             gender = st.text_input('Please mention')
-        self.gender = gender
+        values['gender'] = gender
         dob = st.date_input('Date of birth (YYYY/MM/DD)')
         st.info('If the required date is not in the calendar, please type it in the box above.')
-        self.date_of_birth = dob.strftime('%d-%m-%Y')       # converts date of birth to the desired string format
-        self.age = calculate_age(dob)
-        self.blood_group = st.text_input('Blood group')
-        self.contact_number_1 = st.text_input('Contact number')
+        values['date_of_birth'] = dob.isoformat()       # converts date of birth to the desired string format (YYYY-MM-DD)
+        values['blood_group'] = st.text_input('Blood group')
+        values['contact_number_1'] = st.text_input('Contact number')
         contact_number_2 = st.text_input('Alternate contact number (optional)')
-        self.contact_number_2 = (lambda phone : None if phone == '' else phone)(contact_number_2)
-        self.aadhar_or_voter_id = st.text_input('Aadhar ID / Voter ID')
-        self.weight = st.number_input('Weight (in kg)', value = 0, min_value = 0, max_value = 400)
-        self.height = st.number_input('Height (in cm)', value = 0, min_value = 0, max_value = 275)
-        self.address = st.text_area('Address')
-        self.city = st.text_input('City')
-        self.state = st.text_input('State')
-        self.pin_code = st.text_input('PIN code')
-        self.next_of_kin_name = st.text_input("Next of kin's name")
-        self.next_of_kin_relation_to_patient = st.text_input("Next of kin's relation to patient")
-        self.next_of_kin_contact_number = st.text_input("Next of kin's contact number")
+        values['contact_number_2'] = (lambda phone : None if phone == '' else phone)(contact_number_2)
+        values['aadhar_or_voter_id'] = st.text_input('Aadhar ID / Voter ID')
+        values['weight'] = st.number_input('Weight (in kg)', value = 0, min_value = 0, max_value = 400)
+        values['height'] = st.number_input('Height (in cm)', value = 0, min_value = 0, max_value = 275)
+        values['address'] = st.text_area('Address')
+        values['city'] = st.text_input('City')
+        values['state'] = st.text_input('State')
+        values['pin_code'] = st.text_input('PIN code')
+        values['next_of_kin_name'] = st.text_input("Next of kin's name")
+        values['next_of_kin_relation_to_patient'] = st.text_input("Next of kin's relation to patient")
+        values['next_of_kin_contact_number'] = st.text_input("Next of kin's contact number")
         email_id = st.text_input('Email ID (optional)')
-        self.email_id = (lambda email : None if email == '' else email)(email_id)
-        self.date_of_registration = datetime.now().strftime('%d-%m-%Y')
-        self.time_of_registration = datetime.now().strftime('%H:%M:%S')
-        self.id = generate_patient_id(self.date_of_registration,
-                    self.time_of_registration)
+        values['email_id'] = (lambda email : None if email == '' else email)(email_id)
+        values['date_of_registration'] = datetime.now().strftime('%Y-%m-%d')
+        values['time_of_registration'] = datetime.now().strftime('%H:%M:%S')
         save = st.button('Save')
 
-        # executing SQLite statements to save the new patient record to the database
+        # saving the new patient record to the database
         if save:
-            conn, c = db.connection()
-            with conn:
-                c.execute(
-                    """
-                    INSERT INTO patient_record
-                    (
-                        id, name, age, gender, date_of_birth, blood_group,
-                        contact_number_1, contact_number_2, aadhar_or_voter_id,
-                        weight, height, address,city, state, pin_code,
-                        next_of_kin_name, next_of_kin_relation_to_patient,
-                        next_of_kin_contact_number, email_id,
-                        date_of_registration, time_of_registration
-                    )
-                    VALUES (
-                        :id, :name, :age, :gender, :dob, :blood_group,
-                        :phone_1, :phone_2, :uid, :weight, :height,
-                        :address, :city, :state, :pin,
-                        :kin_name, :kin_relation, :kin_phone, :email_id,
-                        :reg_date, :reg_time
-                    );
-                    """,
-                    {
-                        'id': self.id, 'name': self.name, 'age': self.age,
-                        'gender': self.gender, 'dob': self.date_of_birth,
-                        'blood_group': self.blood_group,
-                        'phone_1': self.contact_number_1,
-                        'phone_2': self.contact_number_2,
-                        'uid': self.aadhar_or_voter_id, 'weight': self.weight,
-                        'height': self.height, 'address': self.address,
-                        'city': self.city, 'state': self.state,
-                        'pin': self.pin_code, 'kin_name': self.next_of_kin_name,
-                        'kin_relation': self.next_of_kin_relation_to_patient,
-                        'kin_phone': self.next_of_kin_contact_number,
-                        'email_id': self.email_id,
-                        'reg_date': self.date_of_registration,
-                        'reg_time': self.time_of_registration
-                    }
-                )
+            id = repository.patients.insert(values)
             st.success('Patient details saved successfully.')
-            st.write('Your Patient ID is: ', self.id)
-            conn.close()
+            st.write('Your Patient ID is: ', id)
 
     # method to update an existing patient record in the database
     def update_patient(self):
+        values = {}
         id = st.text_input('Enter Patient ID of the patient to be updated')
         if id == '':
             st.empty()
@@ -169,82 +87,32 @@ class Patient:
             st.error('Invalid Patient ID')
         else:
             st.success('Verified')
-            conn, c = db.connection()
 
             # shows the current details of the patient before updating
-            with conn:
-                c.execute(
-                    """
-                    SELECT *
-                    FROM patient_record
-                    WHERE id = :id;
-                    """,
-                    { 'id': id }
-                )
-                st.write('Here are the current details of the patient:')
-                show_patient_details(c.fetchall())
+            st.write('Here are the current details of the patient:')
+            show_patient(id)
 
             st.write('Enter new details of the patient:')
-            self.contact_number_1 = st.text_input('Contact number')
+            values['contact_number_1'] = st.text_input('Contact number')
             contact_number_2 = st.text_input('Alternate contact number (optional)')
-            self.contact_number_2 = (lambda phone : None if phone == '' else phone)(contact_number_2)
-            self.weight = st.number_input('Weight (in kg)', value = 0, min_value = 0, max_value = 400)
-            self.height = st.number_input('Height (in cm)', value = 0, min_value = 0, max_value = 275)
-            self.address = st.text_area('Address')
-            self.city = st.text_input('City')
-            self.state = st.text_input('State')
-            self.pin_code = st.text_input('PIN code')
-            self.next_of_kin_name = st.text_input("Next of kin's name")
-            self.next_of_kin_relation_to_patient = st.text_input("Next of kin's relation to patient")
-            self.next_of_kin_contact_number = st.text_input("Next of kin's contact number")
+            values['contact_number_2'] = (lambda phone : None if phone == '' else phone)(contact_number_2)
+            values['weight'] = st.number_input('Weight (in kg)', value = 0, min_value = 0, max_value = 400)
+            values['height'] = st.number_input('Height (in cm)', value = 0, min_value = 0, max_value = 275)
+            values['address'] = st.text_area('Address')
+            values['city'] = st.text_input('City')
+            values['state'] = st.text_input('State')
+            values['pin_code'] = st.text_input('PIN code')
+            values['next_of_kin_name'] = st.text_input("Next of kin's name")
+            values['next_of_kin_relation_to_patient'] = st.text_input("Next of kin's relation to patient")
+            values['next_of_kin_contact_number'] = st.text_input("Next of kin's contact number")
             email_id = st.text_input('Email ID (optional)')
-            self.email_id = (lambda email : None if email == '' else email)(email_id)
+            values['email_id'] = (lambda email : None if email == '' else email)(email_id)
             update = st.button('Update')
 
-            # executing SQLite statements to update this patient's record in the database
+            # saving the new details of this patient to the database
             if update:
-                with conn:
-                    c.execute(
-                        """
-                        SELECT date_of_birth
-                        FROM patient_record
-                        WHERE id = :id;
-                        """,
-                        { 'id': id }
-                    )
-
-                    # converts date of birth to the required format for age calculation
-                    dob = [int(d) for d in c.fetchone()[0].split('-')[::-1]]
-                    dob = date(dob[0], dob[1], dob[2])
-                    self.age = calculate_age(dob)
-
-                with conn:
-                    c.execute(
-                        """
-                        UPDATE patient_record
-                        SET age = :age, contact_number_1 = :phone_1,
-                        contact_number_2 = :phone_2, weight = :weight,
-                        height = :height, address = :address, city = :city,
-                        state = :state, pin_code = :pin, next_of_kin_name = :kin_name,
-                        next_of_kin_relation_to_patient = :kin_relation,
-                        next_of_kin_contact_number = :kin_phone, email_id = :email_id
-                        WHERE id = :id;
-                        """,
-                        {
-                            'id': id, 'age': self.age,
-                            'phone_1': self.contact_number_1,
-                            'phone_2': self.contact_number_2,
-                            'weight': self.weight, 'height': self.height,
-                            'address': self.address, 'city': self.city,
-                            'state': self.state, 'pin': self.pin_code,
-                            'kin_name': self.next_of_kin_name,
-                            'kin_relation': self.next_of_kin_relation_to_patient,
-                            'kin_phone': self.next_of_kin_contact_number,
-                            'email_id': self.email_id
-                        }
-                    )
+                repository.patients.update(id, values)
                 st.success('Patient details updated successfully.')
-                conn.close()
 
     # method to delete an existing patient record from the database
     def delete_patient(self):
@@ -255,69 +123,61 @@ class Patient:
             st.error('Invalid Patient ID')
         else:
             st.success('Verified')
-            conn, c = db.connection()
 
             # shows the current details of the patient before deletion
-            with conn:
-                c.execute(
-                    """
-                    SELECT *
-                    FROM patient_record
-                    WHERE id = :id;
-                    """,
-                    { 'id': id }
-                )
-                st.write('Here are the details of the patient to be deleted:')
-                show_patient_details(c.fetchall())
+            st.write('Here are the details of the patient to be deleted:')
+            show_patient(id)
 
-                confirm = st.checkbox('Check this box to confirm deletion')
-                if confirm:
-                    delete = st.button('Delete')
+            confirm = st.checkbox('Check this box to confirm deletion')
+            if confirm:
+                delete = st.button('Delete')
 
-                    # executing SQLite statements to delete this patient's record from the database
-                    if delete:
-                        c.execute(
-                            """
-                            DELETE FROM patient_record
-                            WHERE id = :id;
-                            """,
-                            { 'id': id }
-                        )
-                        st.success('Patient details deleted successfully.')
-            conn.close()
+                # deleting this patient's record from the database
+                if delete:
+                    repository.patients.delete(id)
+                    st.success('Patient details deleted successfully.')
 
-    # method to show the complete patient record
+    # method to show the complete patient record (one page at a time)
     def show_all_patients(self):
-        conn, c = db.connection()
-        with conn:
-            c.execute(
-                """
-                SELECT *
-                FROM patient_record;
-                """
-            )
-            show_patient_details(c.fetchall())
-        conn.close()
+        pagination.show_paginated_records(repository.patients, show_patient_details)
 
-    # method to search and show a particular patient's details in the database using patient id
+    # method to search and show a particular patient's details in the database using patient id,
+    # or the patients matching a name, contact number, city or Aadhar ID / Voter ID (full-text search)
     def search_patient(self):
-        id = st.text_input('Enter Patient ID of the patient to be searched')
+        search_by = st.radio('Search by', ['Patient ID', 'Name, contact number, city or Aadhar ID / Voter ID'])
+        if search_by == 'Patient ID':
+            id = st.text_input('Enter Patient ID of the patient to be searched')
+            if id == '':
+                st.empty()
+            elif not verify_patient_id(id):
+                st.error('Invalid Patient ID')
+            else:
+                st.success('Verified')
+                st.write('Here are the details of the patient you searched for:')
+                show_patient(id)
+        else:
+            text = st.text_input('Enter name, contact number, city or Aadhar ID / Voter ID of the patient to be searched')
+            if text == '':
+                st.empty()
+            else:
+                st.write('Here are the patients matching your search (best matches first):')
+                rendering.show_call(patient_titles, repository.patients.search, text)
+
+    # method to show a patient's details along with all their prescriptions, medical tests and registration in time order
+    def show_patient_timeline(self):
+        id = st.text_input('Enter Patient ID of the patient whose timeline is to be shown')
         if id == '':
             st.empty()
-        elif not verify_patient_id(id):
-            st.error('Invalid Patient ID')
         else:
-            st.success('Verified')
-            conn, c = db.connection()
-            with conn:
-                c.execute(
-                    """
-                    SELECT *
-                    FROM patient_record
-                    WHERE id = :id;
-                    """,
-                    { 'id': id }
-                )
-                st.write('Here are the details of the patient you searched for:')
-                show_patient_details(c.fetchall())
-            conn.close()
+            timeline.show_timeline(id)
+
+    # method to show the patients whose age is within a given range (looked up through the index on the date of birth)
+    def show_patients_by_age_group(self):
+        min_age = st.number_input('Minimum age', value = 0, min_value = 0, max_value = 150)
+        max_age = st.number_input('Maximum age', value = 150, min_value = 0, max_value = 150)
+        if min_age > max_age:
+            st.error('Minimum age cannot be greater than maximum age')
+        else:
+            count = rendering.cached_call(repository.patients.count_by_age_group, min_age, max_age)
+            st.write(f'There are {count} patients aged {min_age} to {max_age} (youngest first, showing at most {age_group_limit}):')
+            rendering.show_call(patient_titles, repository.patients.list_by_age_group, min_age, max_age, age_group_limit)
@@ -1,177 +1,84 @@
 import streamlit as st
 from datetime import datetime
-import database as db
-import pandas as pd
-import patient
-import doctor
+import rendering
+import repository
 
 # function to verify prescription id
 def verify_prescription_id(prescription_id):
-    verify = False
-    conn, c = db.connection()
-    with conn:
-        c.execute(
-            """
-            SELECT id
-            FROM prescription_record;
-            """
-        )
-    for id in c.fetchall():
-        if id[0] == prescription_id:
-            verify = True
-            break
-    conn.close()
-    return verify
+    return repository.prescriptions.exists(prescription_id)
 
-# function to show the details of prescription(s) given in a list (provided as a parameter)
-def show_prescription_details(list_of_prescriptions):
-    prescription_titles = ['Prescription ID', 'Patient ID', 'Patient name',
-                          'Doctor ID', 'Doctor name', 'Diagnosis', 'Comments',
-                          'Medicine 1 name', 'Medicine 1 dosage and description',
-                          'Medicine 2 name', 'Medicine 2 dosage and description',
-                          'Medicine 3 name', 'Medicine 3 dosage and description',]
-    if len(list_of_prescriptions) == 0:
-        st.warning('No data to show')
-    elif len(list_of_prescriptions) == 1:
-        prescription_details = [x for x in list_of_prescriptions[0]]
-        series = pd.Series(data = prescription_details, index = prescription_titles)
-        st.write(series)
-    else:
-        prescription_details = []
-        for prescription in list_of_prescriptions:
-            prescription_details.append([x for x in prescription])
-        df = pd.DataFrame(data = prescription_details, columns = prescription_titles)
-        st.write(df)
-
-# function to generate unique prescription id using current date and time
-def generate_prescription_id():
-    id_1 = datetime.now().strftime('%S%M%H')
-    id_2 = datetime.now().strftime('%Y%m%d')[2:]
-    id = f'M-{id_1}-{id_2}'
-    return id
+# titles of the columns of the prescriptions' table (in the order of the columns)
+prescription_titles = {
+    'id': 'Prescription ID', 'patient_id': 'Patient ID', 'patient_name': 'Patient name',
+    'doctor_id': 'Doctor ID', 'doctor_name': 'Doctor name',
+    'date_time': 'Date and time [YYYY-MM-DD hh:mm]', 'diagnosis': 'Diagnosis',
+    'comments': 'Comments', 'medicines': 'Medicines (dosage and description)'
+}
 
-# function to fetch patient name from the database for the given patient id
-def get_patient_name(patient_id):
-    conn, c = db.connection()
-    with conn:
-        c.execute(
-            """
-            SELECT name
-            FROM patient_record
-            WHERE id = :id;
-            """,
-            { 'id': patient_id }
-        )
-    return c.fetchone()[0]
+# maximum number of medicines in a prescription
+max_medicines = 20
 
-# function to fetch doctor name from the database for the given doctor id
-def get_doctor_name(doctor_id):
-    conn, c = db.connection()
-    with conn:
-        c.execute(
-            """
-            SELECT name
-            FROM doctor_record
-            WHERE id = :id;
-            """,
-            { 'id': doctor_id }
-        )
-    return c.fetchone()[0]
+# function to show the details of prescription(s) given in a list (provided as a parameter)
+def show_prescription_details(list_of_prescriptions):
+    rendering.show_records(list_of_prescriptions, prescription_titles)
+
+# function to show the details of the prescription with the given prescription id
+def show_prescription(prescription_id):
+    rendering.show_call(prescription_titles, repository.prescriptions.get, prescription_id)
+
+# function to enter the medicines of a prescription (returns a list of (name, dosage and description) tuples,
+# leaving out the medicines whose name is left empty)
+def enter_medicines():
+    number_of_medicines = st.number_input('Number of medicines', value = 1, min_value = 1, max_value = max_medicines)
+    medicines = []
+    for i in range(1, number_of_medicines + 1):
+        name = st.text_input(f'Medicine {i} name')
+        dose_desc = st.text_area(f'Medicine {i} dosage and description')
+        if name != '':
+            medicines.append((name, (lambda dose_desc: None if dose_desc == '' else dose_desc)(dose_desc)))
+    return medicines
 
 # class containing all the fields and methods required to work with the prescriptions' table in the database
 class Prescription:
 
-    def __init__(self):
-        self.id = str()
-        self.patient_id = str()
-        self.patient_name = str()
-        self.doctor_id = str()
-        self.doctor_name = str()
-        self.diagnosis = str()
-        self.comments = str()
-        self.medicine_1_name = str()
-        self.medicine_1_dosage_description = str()
-        self.medicine_2_name = str()
-        self.medicine_2_dosage_description = str()
-        self.medicine_3_name = str()
-        self.medicine_3_dosage_description = str()
+    __slots__ = ()
 
     # method to add a new prescription record to the database
     def add_prescription(self):
+        values = {}
         st.write('Enter prescription details:')
         patient_id = st.text_input('Patient ID')
         if patient_id == '':
             st.empty()
-        elif not patient.verify_patient_id(patient_id):
+        elif not repository.patients.exists(patient_id):
             st.error('Invalid Patient ID')
         else:
             st.success('Verified')
-            self.patient_id = patient_id
-            self.patient_name = get_patient_name(patient_id)
+            values['patient_id'] = patient_id
         doctor_id = st.text_input('Doctor ID')
         if doctor_id == '':
             st.empty()
-        elif not doctor.verify_doctor_id(doctor_id):
+        elif not repository.doctors.exists(doctor_id):
             st.error('Invalid Doctor ID')
         else:
             st.success('Verified')
-            self.doctor_id = doctor_id
-            self.doctor_name = get_doctor_name(doctor_id)
-        self.diagnosis = st.text_area('Diagnosis')
+            values['doctor_id'] = doctor_id
+        values['diagnosis'] = st.text_area('Diagnosis')
         comments = st.text_area('Comments (if any)')
-        self.comments = (lambda comments : None if comments == '' else comments)(comments)
-        self.medicine_1_name = st.text_input('Medicine 1 name')
-        self.medicine_1_dosage_description = st.text_area('Medicine 1 dosage and description')
-        med_2_name = st.text_input('Medicine 2 name (if any)')
-        self.medicine_2_name = (lambda name : None if name == '' else name)(med_2_name)
-        med_2_dose_desc = st.text_area('Medicine 2 dosage and description')
-        self.medicine_2_dosage_description = (lambda dose_desc: None if dose_desc == '' else dose_desc)(med_2_dose_desc)
-        med_3_name = st.text_input('Medicine 3 name (if any)')
-        self.medicine_3_name = (lambda name : None if name == '' else name)(med_3_name)
-        med_3_dose_desc = st.text_area('Medicine 3 dosage and description')
-        self.medicine_3_dosage_description = (lambda dose_desc: None if dose_desc == '' else dose_desc)(med_3_dose_desc)
-        self.id = generate_prescription_id()
+        values['comments'] = (lambda comments : None if comments == '' else comments)(comments)
+        values['medicines'] = enter_medicines()
+        values['date_time'] = datetime.now().strftime('%Y-%m-%d %H:%M')
         save = st.button('Save')
 
-        # executing SQLite statements to save the new prescription record to the database
+        # saving the new prescription record (along with its medicines) to the database
         if save:
-            conn, c = db.connection()
-            with conn:
-                c.execute(
-                    """
-                    INSERT INTO prescription_record
-                    (
-                        id, patient_id, patient_name, doctor_id,
-                        doctor_name, diagnosis, comments,
-                        medicine_1_name, medicine_1_dosage_description,
-                        medicine_2_name, medicine_2_dosage_description,
-                        medicine_3_name, medicine_3_dosage_description
-                    )
-                    VALUES (
-                        :id, :p_id, :p_name, :dr_id, :dr_name, :diagnosis,
-                        :comments, :med_1_name, :med_1_dose_desc, :med_2_name,
-                        :med_2_dose_desc, :med_3_name, :med_3_dose_desc
-                    );
-                    """,
-                    {
-                        'id': self.id, 'p_id': self.patient_id,
-                        'p_name': self.patient_name, 'dr_id': self.doctor_id,
-                        'dr_name': self.doctor_name, 'diagnosis': self.diagnosis,
-                        'comments': self.comments,
-                        'med_1_name': self.medicine_1_name,
-                        'med_1_dose_desc': self.medicine_1_dosage_description,
-                        'med_2_name': self.medicine_2_name,
-                        'med_2_dose_desc': self.medicine_2_dosage_description,
-                        'med_3_name': self.medicine_3_name,
-                        'med_3_dose_desc': self.medicine_3_dosage_description,
-                    }
-                )
+            id = repository.prescriptions.insert(values)
             st.success('Prescription details saved successfully.')
-            st.write('The Prescription ID is: ', self.id)
-            conn.close()
+            st.write('The Prescription ID is: ', id)
 
     # method to update an existing prescription record in the database
     def update_prescription(self):
+        values = {}
         id = st.text_input('Enter Prescription ID of the prescription to be updated')
         if id == '':
             st.empty()
@@ -179,65 +86,22 @@ class Prescription:
             st.error('Invalid Prescription ID')
         else:
             st.success('Verified')
-            conn, c = db.connection()
 
             # shows the current details of the prescription before updating
-            with conn:
-                c.execute(
-                    """
-                    SELECT *
-                    FROM prescription_record
-                    WHERE id = :id;
-                    """,
-                    { 'id': id }
-                )
-                st.write('Here are the current details of the prescription:')
-                show_prescription_details(c.fetchall())
+            st.write('Here are the current details of the prescription:')
+            show_prescription(id)
 
             st.write('Enter new details of the prescription:')
-            self.diagnosis = st.text_area('Diagnosis')
+            values['diagnosis'] = st.text_area('Diagnosis')
             comments = st.text_area('Comments (if any)')
-            self.comments = (lambda comments : None if comments == '' else comments)(comments)
-            self.medicine_1_name = st.text_input('Medicine 1 name')
-            self.medicine_1_dosage_description = st.text_area('Medicine 1 dosage and description')
-            med_2_name = st.text_input('Medicine 2 name (if any)')
-            self.medicine_2_name = (lambda name : None if name == '' else name)(med_2_name)
-            med_2_dose_desc = st.text_area('Medicine 2 dosage and description')
-            self.medicine_2_dosage_description = (lambda dose_desc: None if dose_desc == '' else dose_desc)(med_2_dose_desc)
-            med_3_name = st.text_input('Medicine 3 name (if any)')
-            self.medicine_3_name = (lambda name : None if name == '' else name)(med_3_name)
-            med_3_dose_desc = st.text_area('Medicine 3 dosage and description')
-            self.medicine_3_dosage_description = (lambda dose_desc: None if dose_desc == '' else dose_desc)(med_3_dose_desc)
+            values['comments'] = (lambda comments : None if comments == '' else comments)(comments)
+            values['medicines'] = enter_medicines()
             update = st.button('Update')
 
-            # executing SQLite statements to update this prescription's record in the database
+            # saving the new details (and medicines) of this prescription to the database
             if update:
-                with conn:
-                    c.execute(
-                        """
-                        UPDATE prescription_record
-                        SET diagnosis = :diagnosis, comments = :comments,
-                        medicine_1_name = :med_1_name,
-                        medicine_1_dosage_description = :med_1_dose_desc,
-                        medicine_2_name = :med_2_name,
-                        medicine_2_dosage_description = :med_2_dose_desc,
-                        medicine_3_name = :med_3_name,
-                        medicine_3_dosage_description = :med_3_dose_desc
-                        WHERE id = :id;
-                        """,
-                        {
-                            'id': id, 'diagnosis': self.diagnosis,
-                            'comments': self.comments,
-                            'med_1_name': self.medicine_1_name,
-                            'med_1_dose_desc': self.medicine_1_dosage_description,
-                            'med_2_name': self.medicine_2_name,
-                            'med_2_dose_desc': self.medicine_2_dosage_description,
-                            'med_3_name': self.medicine_3_name,
-                            'med_3_dose_desc': self.medicine_3_dosage_description
-                        }
-                    )
+                repository.prescriptions.update(id, values)
                 st.success('Prescription details updated successfully.')
-                conn.close()
 
     # method to delete an existing prescription record from the database
     def delete_prescription(self):
@@ -248,56 +112,39 @@ class Prescription:
             st.error('Invalid Prescription ID')
         else:
             st.success('Verified')
-            conn, c = db.connection()
 
             # shows the current details of the prescription before deletion
-            with conn:
-                c.execute(
-                    """
-                    SELECT *
-                    FROM prescription_record
-                    WHERE id = :id;
-                    """,
-                    { 'id': id }
-                )
-                st.write('Here are the details of the prescription to be deleted:')
-                show_prescription_details(c.fetchall())
+            st.write('Here are the details of the prescription to be deleted:')
+            show_prescription(id)
 
-                confirm = st.checkbox('Check this box to confirm deletion')
-                if confirm:
-                    delete = st.button('Delete')
+            confirm = st.checkbox('Check this box to confirm deletion')
+            if confirm:
+                delete = st.button('Delete')
 
-                    # executing SQLite statements to delete this prescription's record from the database
-                    if delete:
-                        c.execute(
-                            """
-                            DELETE FROM prescription_record
-                            WHERE id = :id;
-                            """,
-                            { 'id': id }
-                        )
-                        st.success('Prescription details deleted successfully.')
-            conn.close()
+                # deleting this prescription's record (along with its medicines) from the database
+                if delete:
+                    repository.prescriptions.delete(id)
+                    st.success('Prescription details deleted successfully.')
 
     # method to show all the prescriptions of a particular patient (using patient id)
     def prescriptions_by_patient(self):
         patient_id = st.text_input('Enter Patient ID to get the prescription record of that patient')
         if patient_id == '':
             st.empty()
-        elif not patient.verify_patient_id(patient_id):
-            st.error('Invalid Patient ID')
         else:
-            st.success('Verified')
-            conn, c = db.connection()
-            with conn:
-                c.execute(
-                    """
-                    SELECT *
-                    FROM prescription_record
-                    WHERE patient_id = :p_id;
-                    """,
-                    { 'p_id': patient_id }
-                )
-                st.write('Here is the prescription record of', get_patient_name(patient_id), ':')
-                show_prescription_details(c.fetchall())
-            conn.close()
+            patient_name = repository.patients.get_name(patient_id)        # also verifies the patient id
+            if patient_name is None:
+                st.error('Invalid Patient ID')
+            else:
+                st.success('Verified')
+                st.write('Here is the prescription record of', patient_name, ':')
+                rendering.show_call(prescription_titles, repository.prescriptions.list_by_patient, patient_id)
+
+    # method to show all the prescriptions of a particular medicine (looked up through the index on the medicine name)
+    def prescriptions_by_medicine(self):
+        medicine_name = st.text_input('Enter medicine name to get the prescriptions of that medicine')
+        if medicine_name == '':
+            st.empty()
+        else:
+            st.write('Here are the prescriptions of', medicine_name, ':')
+            rendering.show_call(prescription_titles, repository.prescriptions.list_by_medicine, medicine_name)
@@ -0,0 +1,69 @@
+import keyword
+from functools import lru_cache
+
+# base class of the records read from the database; each set of columns read from a table gets its own subclass
+# (generated from the columns of the query, see record_type) with one slot per column and no per-instance dictionary,
+# and a record can be used like a tuple of its values (indexed, unpacked or turned into a DataFrame row)
+class Record:
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        if len(values) != len(self.__slots__):
+            raise TypeError(f'{type(self).__name__} takes {len(self.__slots__)} values ({len(values)} given)')
+        for column, value in zip(self.__slots__, values):
+            setattr(self, column, value)
+
+    def __iter__(self):
+        return (getattr(self, column) for column in self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self)[index]
+        return getattr(self, self.__slots__[index])
+
+    def __eq__(self, other):
+        return type(self) is type(other) and tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{column}={value!r}' for column, value in zip(self.__slots__, self))})"
+
+    # method to get the values of the record as a dictionary keyed by column name
+    def as_dict(self):
+        return dict(zip(self.__slots__, self))
+
+# function to get the name of the record type of a table (e.g. 'MedicalTestRecord' for medical_test_record)
+def type_name(table):
+    return ''.join(part.title() for part in table.split('_'))
+
+# function to generate (once) the record type of the given table for the given columns, along with its row factory,
+# which builds a record straight from a row of the cursor without going through __init__ (a single assignment unpacks
+# the row into the slots)
+@lru_cache(maxsize = None)
+def record_type(table, columns):
+    for column in columns:
+        if not column.isidentifier() or keyword.iskeyword(column):
+            raise ValueError(f'{column!r} cannot be the name of a record field')
+    record = type(type_name(table), (Record,), { '__slots__': columns })
+    targets = ', '.join(f'record.{column}' for column in columns)
+    source = (
+        f'def from_row(cursor, row):\n'
+        f'    record = new(cls)\n'
+        f'    {targets}{"," if len(columns) == 1 else ""} = row\n'
+        f'    return record\n'
+    )
+    namespace = { 'new': object.__new__, 'cls': record }
+    exec(source, namespace)
+    record.from_row = staticmethod(namespace['from_row'])
+    return record
+
+# function to make the given cursor return the rows of the query it has just run as records of the given table
+# (the record type is generated from the columns of the query, as described by the cursor)
+def use_records(c, table):
+    c.row_factory = record_type(table, tuple(column[0] for column in c.description)).from_row
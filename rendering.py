@@ -0,0 +1,50 @@
+import streamlit as st
+import time
+from functools import lru_cache
+import database as db
+import config
+
+# number of query results kept in memory between reruns (configurable through config.render_cache_size)
+cache_size = getattr(config, 'render_cache_size', 64)
+
+# number of seconds for which a cached result is reused (configurable through config.render_cache_ttl); changes made
+# by this process invalidate the cache straight away, this only bounds how long changes made by other processes go unseen
+cache_ttl = getattr(config, 'render_cache_ttl', 30)
+
+# function to get the key under which results are currently cached (changes after every write and every cache_ttl seconds)
+def cache_key():
+    return db.generation, int(time.monotonic() // cache_ttl)
+
+# function to build a typed DataFrame directly from the given records (a list of row tuples) and column names
+# (pandas is only imported when the first records are shown, as it takes longer to import than the rest of the app)
+def records_frame(records, columns):
+    import pandas as pd
+    return pd.DataFrame.from_records(records, columns = columns).convert_dtypes()
+
+@lru_cache(maxsize = cache_size)
+def cached_call_result(function, arguments, key):
+    return function(*arguments)
+
+# function to call a function reading from the database (reusing the result of an identical call if cached)
+def cached_call(function, *arguments):
+    return cached_call_result(function, arguments, cache_key())
+
+# function to show a DataFrame of records using the given column titles (a single record is shown as a series)
+def show_frame(frame, titles):
+    frame = frame.rename(columns = titles)
+    if len(frame) == 0:
+        st.warning('No data to show')
+    elif len(frame) == 1:
+        st.write(frame.iloc[0].astype('string'))
+    else:
+        st.write(frame)
+
+# function to show the given records (a list of row tuples) using the given column titles (keyed by column name)
+def show_records(records, titles):
+    show_frame(records_frame(records, list(titles)), titles)
+
+# function to call a function reading records from the database (a list of records, a single record or None) and
+# show its result using the given column titles (reusing the result of an identical call if cached)
+def show_call(titles, function, *arguments):
+    records = cached_call(function, *arguments)
+    show_records([] if records is None else records if isinstance(records, list) else [records], titles)
@@ -0,0 +1,372 @@
+import database as db
+import ids
+import lookups
+import records
+import search
+import snapshot
+import write_queue
+
+# class giving access to the records of one table, independently of the user interface (the Streamlit pages are
+# thin views over it, and it can be called directly from scripts, tools and benchmarks)
+class Repository:
+
+    table = str()           # name of the record table
+    prefix = str()          # prefix of the ids generated for new records
+    columns = ()            # columns that can be written (besides the id)
+    related_columns = ()    # values stored outside the table (written by write_related)
+    name_column = None      # column holding the names of the records (if they have names)
+
+    # method to get the name of the table or view the records are read from
+    def view(self):
+        return db.record_view(self.table)
+
+    # method to run a query and get its result as a list of records (built straight from the rows by the row factory
+    # of the record type generated for the columns of the query); reporting queries are read from the snapshot of the
+    # database in reporting mode
+    def query(self, query, parameters = {}, reporting = False):
+        with (snapshot.connection() if reporting else db.connection()) as (conn, c):
+            c.execute(query, parameters)
+            records.use_records(c, self.table)
+            return c.fetchall()
+
+    # method to check if a record with the given id exists (ids found to exist are kept in the lookup cache)
+    def exists(self, id):
+        return bool(lookups.cache.get((self.table, 'exists', id), lambda : db.verify_id(self.table, id) or None))
+
+    # method to find which of the given ids exist (returned as a set); the ids that aren't in the lookup cache are
+    # verified together
+    def existing(self, ids):
+        ids = list(dict.fromkeys(ids))
+        found = { id for id in ids if lookups.cache.get((self.table, 'exists', id), lambda : None) }
+        version = lookups.cache.version
+        verified = db.verify_ids(self.table, [id for id in ids if id not in found])
+        for id in verified:
+            lookups.cache.store((self.table, 'exists', id), True, version)
+        return found | verified
+
+    # method to get the name of the record with the given id (None if there is no such record), through the lookup cache
+    def get_name(self, id):
+        if self.name_column is None:
+            raise ValueError(f'The records of {self.table} have no names')
+        return lookups.cache.get((self.table, 'name', id), lambda : self.read_name(id))
+
+    # method to read the name of the record with the given id from the database
+    def read_name(self, id):
+        with db.connection() as (conn, c):
+            c.execute(
+                f"""
+                SELECT {self.name_column}
+                FROM {self.table}
+                WHERE id = :id;
+                """,
+                { 'id': id }
+            )
+            record = c.fetchone()
+            return None if record is None else record[0]
+
+    # method to update the lookup cache after the given rows (dictionaries of values, along with their ids) were written
+    def cache_written(self, rows):
+        for row in rows:
+            lookups.cache.set((self.table, 'exists', row['id']), True)
+            if self.name_column in row:
+                lookups.cache.set((self.table, 'name', row['id']), row[self.name_column])
+
+    # method to get the record with the given id (None if there is no such record)
+    def get(self, id):
+        records = self.query(
+            f"""
+            SELECT *
+            FROM {self.view()}
+            WHERE id = :id;
+            """,
+            { 'id': id }
+        )
+        return records[0] if records else None
+
+    # method to count the records (a reporting query)
+    def count(self):
+        with snapshot.connection() as (conn, c):
+            c.execute(f'SELECT COUNT(*) FROM {self.table};')
+            return c.fetchone()[0]
+
+    # method to get a page of records ordered by id, starting after the given id (keyset pagination; a reporting query)
+    def list(self, after_id = None, limit = 50):
+        if after_id is None:
+            return self.query(
+                f"""
+                SELECT *
+                FROM {self.view()}
+                ORDER BY id
+                LIMIT :limit;
+                """,
+                { 'limit': limit },
+                reporting = True
+            )
+        return self.query(
+            f"""
+            SELECT *
+            FROM {self.view()}
+            WHERE id > :after_id
+            ORDER BY id
+            LIMIT :limit;
+            """,
+            { 'after_id': after_id, 'limit': limit },
+            reporting = True
+        )
+
+    # method to get the records matching the given text (full-text search, best matches first)
+    def search(self, text, limit = search.result_limit):
+        query = search.match_expression(text)
+        if query == '':
+            return []
+        return self.query(search.search_query(self.table), { 'query': query, 'limit': limit })
+
+    # method to check that the given values only set columns that can be written
+    def check_columns(self, values, extra = ()):
+        for column in values:
+            if column not in self.columns and column not in extra:
+                raise ValueError(f'{self.table} has no writable column named {column}')
+
+    # method to write what is stored outside the table itself (e.g. the medicines of prescriptions) for the given rows
+    # (dictionaries of values, along with their ids), using the cursor of the transaction writing the rows
+    def write_related(self, c, rows):
+        pass
+
+    # method to add a new record from a dictionary of column values (an id is generated if not given); returns its id
+    def insert(self, values):
+        return self.insert_many([values])[0]
+
+    # method to add several new records in a single transaction (as insert does for one); returns their ids
+    def insert_many(self, rows):
+        rows = [dict(row) for row in rows]
+        for row in rows:
+            self.check_columns(row, ('id',) + self.related_columns)
+            if not row.get('id'):
+                row['id'] = ids.generate_id(self.prefix)
+        if rows:
+            write_queue.writer.write(lambda c : self.write_rows(c, rows))
+            self.cache_written(rows)
+        return [row['id'] for row in rows]
+
+    # method to insert the given rows (dictionaries of values, along with their ids) using the given cursor
+    def write_rows(self, c, rows):
+        columns = ('id',) + self.columns
+        c.executemany(
+            f"""
+            INSERT INTO {self.table} ({', '.join(columns)})
+            VALUES ({', '.join(':' + column for column in columns)});
+            """,
+            [{ column: row.get(column) for column in columns } for row in rows]
+        )
+        self.write_related(c, rows)
+
+    # method to change the given columns (a dictionary of column values) of the record with the given id;
+    # returns whether there was such a record
+    def update(self, id, values):
+        self.check_columns(values, self.related_columns)
+        updated = write_queue.writer.write(lambda c : self.update_row(c, id, values))
+        if updated:
+            self.cache_written([{ **values, 'id': id }])
+        return updated
+
+    # method to change the given columns of the record with the given id using the given cursor
+    # (returns whether there was such a record)
+    def update_row(self, c, id, values):
+        columns = [column for column in values if column in self.columns]
+        if columns:
+            c.execute(
+                f"""
+                UPDATE {self.table}
+                SET {', '.join(f'{column} = :{column}' for column in columns)}
+                WHERE id = :id;
+                """,
+                { **{ column: values[column] for column in columns }, 'id': id }
+            )
+            updated = c.rowcount > 0
+        else:
+            c.execute(f'SELECT EXISTS (SELECT 1 FROM {self.table} WHERE id = :id);', { 'id': id })
+            updated = bool(c.fetchone()[0])
+        if updated:
+            self.write_related(c, [{ **values, 'id': id }])
+        return updated
+
+    # method to delete the record with the given id; returns whether there was such a record
+    # (raises sqlite3.IntegrityError if other records refer to it)
+    def delete(self, id):
+        deleted = write_queue.writer.write(lambda c : self.delete_row(c, id))
+        lookups.cache.invalidate((self.table, 'exists', id), (self.table, 'name', id))
+        return deleted
+
+    # method to delete the record with the given id using the given cursor (returns whether there was such a record)
+    def delete_row(self, c, id):
+        c.execute(
+            f"""
+            DELETE FROM {self.table}
+            WHERE id = :id;
+            """,
+            { 'id': id }
+        )
+        return c.rowcount > 0
+
+# class giving access to the patients' records
+class PatientRepository(Repository):
+
+    table = 'patient_record'
+    prefix = 'P'
+    columns = (
+        'name', 'gender', 'date_of_birth', 'blood_group', 'contact_number_1', 'contact_number_2',
+        'aadhar_or_voter_id', 'weight', 'height', 'address', 'city', 'state', 'pin_code', 'next_of_kin_name',
+        'next_of_kin_relation_to_patient', 'next_of_kin_contact_number', 'email_id', 'date_of_registration',
+        'time_of_registration'
+    )
+    name_column = 'name'
+
+    # method to count the patients whose age is within the given range
+    def count_by_age_group(self, min_age, max_age):
+        earliest, latest = db.date_of_birth_range(min_age, max_age)
+        with db.connection() as (conn, c):
+            c.execute(
+                """
+                SELECT COUNT(*)
+                FROM patient_record
+                WHERE date_of_birth > :earliest AND date_of_birth <= :latest;
+                """,
+                { 'earliest': earliest, 'latest': latest }
+            )
+            return c.fetchone()[0]
+
+    # method to get the patients whose age is within the given range, youngest first
+    # (looked up through the index on the date of birth)
+    def list_by_age_group(self, min_age, max_age, limit):
+        earliest, latest = db.date_of_birth_range(min_age, max_age)
+        return self.query(
+            """
+            SELECT *
+            FROM patient_view
+            WHERE date_of_birth > :earliest AND date_of_birth <= :latest
+            ORDER BY date_of_birth DESC
+            LIMIT :limit;
+            """,
+            { 'earliest': earliest, 'latest': latest, 'limit': limit }
+        )
+
+# class giving access to the doctors' records
+class DoctorRepository(Repository):
+
+    table = 'doctor_record'
+    prefix = 'DR'
+    columns = (
+        'name', 'gender', 'date_of_birth', 'blood_group', 'department_id', 'contact_number_1', 'contact_number_2',
+        'aadhar_or_voter_id', 'email_id', 'qualification', 'specialisation', 'years_of_experience', 'address',
+        'city', 'state', 'pin_code'
+    )
+    name_column = 'name'
+
+    # method to get the id and name of the doctors working in the department with the given id
+    def list_by_department(self, department_id):
+        return self.query(
+            """
+            SELECT id, name
+            FROM doctor_record
+            WHERE department_id = :dept_id;
+            """,
+            { 'dept_id': department_id }
+        )
+
+# class giving access to the departments' records
+class DepartmentRepository(Repository):
+
+    table = 'department_record'
+    prefix = 'D'
+    columns = ('name', 'description', 'contact_number_1', 'contact_number_2', 'address', 'email_id')
+    name_column = 'name'
+
+# class giving access to the prescriptions' records (their medicines are given and read along with them, as a list of
+# (name, dosage and description) tuples when written, and as a single text column when read)
+class PrescriptionRepository(Repository):
+
+    table = 'prescription_record'
+    prefix = 'M'
+    columns = ('patient_id', 'doctor_id', 'date_time', 'diagnosis', 'comments')
+    related_columns = ('medicines',)
+
+    # method to save the medicines of the given prescriptions (replacing their previous medicines, if any)
+    def write_related(self, c, rows):
+        rows = [row for row in rows if 'medicines' in row]
+        if not rows:
+            return
+        c.executemany(
+            """
+            DELETE FROM prescription_item
+            WHERE prescription_id = :id;
+            """,
+            [{ 'id': row['id'] } for row in rows]
+        )
+        c.executemany(
+            """
+            INSERT INTO prescription_item
+            (prescription_id, position, medicine_name, dosage_description)
+            VALUES (:id, :position, :name, :dose_desc);
+            """,
+            [
+                { 'id': row['id'], 'position': position, 'name': name, 'dose_desc': dose_desc }
+                for row in rows for position, (name, dose_desc) in enumerate(row['medicines'], 1)
+            ]
+        )
+
+    # method to get the prescriptions of the patient with the given id, oldest first
+    def list_by_patient(self, patient_id):
+        return self.query(
+            """
+            SELECT *
+            FROM prescription_view
+            WHERE patient_id = :p_id
+            ORDER BY date_time;
+            """,
+            { 'p_id': patient_id }
+        )
+
+    # method to get the prescriptions of the medicine with the given name, in any case
+    # (looked up through the index on the medicine name)
+    def list_by_medicine(self, medicine_name):
+        return self.query(
+            """
+            SELECT *
+            FROM prescription_view
+            WHERE id IN (
+                SELECT prescription_id
+                FROM prescription_item
+                WHERE medicine_name = :medicine COLLATE NOCASE
+            );
+            """,
+            { 'medicine': medicine_name }
+        )
+
+# class giving access to the medical tests' records
+class MedicalTestRepository(Repository):
+
+    table = 'medical_test_record'
+    prefix = 'T'
+    columns = (
+        'test_name', 'patient_id', 'doctor_id', 'medical_lab_scientist_id', 'test_date_time', 'result_date_time',
+        'result_and_diagnosis', 'description', 'comments', 'cost'
+    )
+
+    # method to get the medical tests of the patient with the given id, oldest first (a reporting query)
+    def list_by_patient(self, patient_id):
+        return self.query(
+            """
+            SELECT *
+            FROM medical_test_view
+            WHERE patient_id = :p_id
+            ORDER BY test_date_time;
+            """,
+            { 'p_id': patient_id },
+            reporting = True
+        )
+
+patients = PatientRepository()
+doctors = DoctorRepository()
+departments = DepartmentRepository()
+prescriptions = PrescriptionRepository()
+medical_tests = MedicalTestRepository()
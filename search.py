@@ -0,0 +1,37 @@
+import re
+import database as db
+
+# maximum number of search results shown
+result_limit = 50
+
+# weights given to matches in each indexed column when ranking the results (matches on the name rank highest)
+column_weights = {
+    'name': 10.0,
+    'contact_number_1': 5.0,
+    'contact_number_2': 5.0,
+    'city': 1.0,
+    'aadhar_or_voter_id': 5.0,
+}
+
+# function to convert the text typed by the user into an FTS5 query matching records containing every word
+# (a word matches any indexed word it is a prefix of, e.g. '9701' matches the contact number '9701890018')
+def match_expression(text):
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+# function to get the query searching the given record table (ranked by relevance, best matches first)
+def search_query(table):
+    index = db.search_index(db.record_table(table))
+    view = db.record_view(table)
+    # the matches are found through the rowids of the table, and read through its view (if it has one)
+    join_view = f'JOIN {view} ON {view}.id = {table}.id' if view != table else ''
+    weights = ', '.join(str(column_weights[column]) for column in db.search_columns[table])
+    return f"""
+        SELECT {view}.*
+        FROM {index}
+        JOIN {table} ON {table}.rowid = {index}.rowid
+        {join_view}
+        WHERE {index} MATCH :query
+        ORDER BY bm25({index}, {weights})
+        LIMIT :limit;
+        """
@@ -0,0 +1,217 @@
+import sqlite3 as sql
+import atexit
+import glob
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from urllib.request import pathname2url
+import config
+import database as db
+import instrumentation
+
+# whether the reporting reads (the complete records shown a page at a time and the medical tests of a patient) are
+# served from a snapshot of the database instead of the database the clerks write to (configurable through
+# config.reporting_snapshot)
+enabled = getattr(config, 'reporting_snapshot', False)
+
+# number of seconds between two refreshes of the snapshot (configurable through config.snapshot_refresh_interval)
+refresh_interval = getattr(config, 'snapshot_refresh_interval', 60)
+
+# number of seconds after which a snapshot is too old to be read from, e.g. if the refreshes fell behind (configurable
+# through config.snapshot_max_staleness); a read finding the snapshot older than this refreshes it first
+max_staleness = getattr(config, 'snapshot_max_staleness', 300)
+
+# PRAGMAs applied to the connections to a snapshot (it is never written, so only the ones about reading apply)
+pragmas = { pragma: db.pragmas[pragma] for pragma in ('cache_size', 'mmap_size', 'temp_store') }
+
+# prefix of the temporary directories the snapshots are kept in, one per process (named after its process id); they are
+# removed when the process exits, and those left behind by a process that was killed or crashed by the next process
+# to take a snapshot on the same machine (or, in a container, along with the container)
+directory_prefix = 'hims_snapshots_'
+
+# function to check whether the process with the given process id is still running
+def running(pid):
+    if os.name == 'nt':         # signal 0 would terminate the process on Windows, where it is assumed to be running
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:             # e.g. running as another user
+        return True
+    return True
+
+# function to delete the snapshot directories of the processes that are no longer running
+def remove_abandoned_directories():
+    for path in glob.glob(os.path.join(glob.escape(tempfile.gettempdir()), glob.escape(directory_prefix) + '*')):
+        pid = os.path.basename(path)[len(directory_prefix):].split('_')[0]
+        if pid.isdigit() and int(pid) != os.getpid() and not running(int(pid)):
+            shutil.rmtree(path, ignore_errors = True)
+
+# class implementing a pool of read-only connections to one snapshot file (opened as immutable, so SQLite takes no
+# locks at all and never looks for changes); once retired, connections returned to it are closed
+class SnapshotPool(db.ConnectionPool):
+
+    def __init__(self, database, size):
+        super().__init__(database, size)
+        self.retired = False
+
+    # method to open a new read-only connection to the snapshot
+    def connect(self):
+        uri = f'file:{pathname2url(os.path.abspath(self.database))}?mode=ro&immutable=1'
+        conn = sql.connect(uri, uri = True, check_same_thread = False,
+                           factory = instrumentation.InstrumentedConnection if instrumentation.enabled else sql.Connection)
+        for pragma, value in pragmas.items():
+            conn.execute(f"PRAGMA {pragma} = {value};")
+        return conn
+
+    # method to return a connection to the pool (closing it if the pool was retired meanwhile)
+    def release(self, conn):
+        if self.retired:
+            conn.close()
+        else:
+            super().release(conn)
+
+    # method to retire the pool once a newer snapshot has replaced it
+    def retire(self):
+        self.retired = True
+        self.close_all()
+
+# class keeping a snapshot of the database for the reporting reads, refreshed in the background with the SQLite online
+# backup API (each refresh writes a new file, so reads already running on the previous snapshot are never disturbed)
+class Snapshot:
+
+    def __init__(self, interval, staleness):
+        self.interval = interval
+        self.staleness = staleness
+        self.lock = threading.Lock()            # held while switching to a new snapshot (never while copying one)
+        self.refreshing = threading.Lock()      # held while refreshing, so that only one copy is taken at a time
+        self.pool = None
+        self.number = 0
+        self.taken = 0.0            # time the current snapshot was taken at (time.monotonic)
+        self.thread = None
+        self.directory = None       # temporary directory of the snapshot files of this process
+        self.pid = None             # process the directory belongs to (a child process makes a directory of its own)
+        self.refreshes = 0          # number of snapshots taken
+        self.failures = 0           # number of refreshes that failed (reads then go to the database itself)
+        self.last_refresh_ms = 0.0
+
+    # method to take a new snapshot of the database and switch the reporting reads over to it (unless the current
+    # snapshot is still younger than the given number of seconds, e.g. as another session has just refreshed it); the
+    # reads carry on from the current snapshot while the new one is copied
+    def refresh(self, unless_younger_than = None):
+        with self.refreshing:
+            age = self.age()
+            if unless_younger_than is not None and age is not None and age <= unless_younger_than:
+                return
+            start = time.perf_counter()
+            number = self.number + 1
+            path = self.path(number)
+            target = sql.connect(path + '.tmp')
+            try:
+                with db.connection() as (conn, c):
+                    conn.backup(target)         # copies every page in one step, from a consistent read transaction
+                target.execute('PRAGMA journal_mode = DELETE;')        # no write-ahead log is needed to read it
+            finally:
+                target.close()
+            os.replace(path + '.tmp', path)
+            pool = SnapshotPool(path, db.pool_size)
+            with self.lock:
+                previous, self.pool = self.pool, pool
+                self.number, self.taken = number, time.monotonic()
+                self.refreshes += 1
+                self.last_refresh_ms = (time.perf_counter() - start) * 1000
+            if previous is not None:
+                previous.retire()
+            self.remove_files(keep = (self.path(number), self.path(number - 1)))
+        db.generation += 1          # query results cached from the previous snapshot are outdated
+
+    # method to get the path of the file of the snapshot with the given number, in the temporary directory of this
+    # process (made by the first refresh, which also deletes the directories abandoned by other processes)
+    def path(self, number):
+        if self.pid != os.getpid():
+            remove_abandoned_directories()
+            self.directory = tempfile.mkdtemp(prefix = f'{directory_prefix}{os.getpid()}_')
+            self.pid = os.getpid()
+            atexit.register(shutil.rmtree, self.directory, True)
+        return os.path.join(self.directory, f'{os.path.basename(config.database_name)}_snapshot_{number}.db')
+
+    # method to delete the files of the snapshots taken by this process, except the given ones (after a refresh, the
+    # current and previous snapshots, which may still be getting read); a file still open elsewhere, which can't be
+    # deleted on every platform, is left for the next refresh to delete
+    def remove_files(self, keep = ()):
+        for path in glob.glob(os.path.join(glob.escape(self.directory), '*')):
+            if path not in keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    # method to get the age of the current snapshot (in seconds; None if there is none yet)
+    def age(self):
+        with self.lock:
+            return None if self.pool is None else time.monotonic() - self.taken
+
+    # method run by the refresh thread: takes a new snapshot every interval
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.refresh()
+            except (sql.Error, OSError):
+                self.failures += 1
+
+    # method to start the refresh thread (if it isn't running yet)
+    def start(self):
+        if self.thread is not None:
+            return
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target = self.run, name = 'snapshot', daemon = True)
+                self.thread.start()
+
+    # method to get the pool of connections to a snapshot recent enough to be read from (taking one if needed);
+    # None if no snapshot could be taken
+    def current_pool(self):
+        self.start()
+        age = self.age()
+        if age is None or age > self.staleness:
+            try:
+                self.refresh(unless_younger_than = self.staleness)
+            except (sql.Error, OSError):
+                self.failures += 1
+        with self.lock:
+            fresh = self.pool is not None and time.monotonic() - self.taken <= self.staleness
+            return self.pool if fresh else None
+
+    # method to get the usage counters of the snapshot
+    def stats(self):
+        age = self.age()
+        return {
+            'enabled': enabled, 'number': self.number, 'age_s': None if age is None else round(age, 1),
+            'refresh_interval_s': self.interval, 'max_staleness_s': self.staleness,
+            'refreshes': self.refreshes, 'failures': self.failures,
+            'last_refresh_ms': round(self.last_refresh_ms, 1)
+        }
+
+snapshot = Snapshot(refresh_interval, max_staleness)
+
+# function to check out a connection for a reporting read along with a cursor (released automatically on exit): to the
+# snapshot in reporting mode, otherwise (or if no snapshot could be taken) to the database itself
+@contextmanager
+def connection():
+    pool = snapshot.current_pool() if enabled else None
+    if pool is None:
+        with db.connection() as (conn, c):
+            yield conn, c
+        return
+    conn = pool.acquire()
+    c = conn.cursor()
+    try:
+        yield conn, c
+    finally:
+        c.close()
+        pool.release(conn)
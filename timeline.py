@@ -0,0 +1,94 @@
+import streamlit as st
+import database as db
+import pagination
+import rendering
+
+# titles of the columns of the patient's details shown above their timeline (in the order of the columns)
+patient_titles = {
+    'id': 'Patient ID', 'name': 'Name', 'age': 'Age', 'gender': 'Gender', 'blood_group': 'Blood group',
+    'contact_number_1': 'Contact number', 'date_of_registration': 'Date of registration (YYYY-MM-DD)'
+}
+
+# titles of the columns of the events in a patient's timeline (in the order of the columns)
+event_titles = {
+    'date_time': 'Date and time [YYYY-MM-DD hh:mm]', 'event': 'Event', 'record_id': 'Record ID',
+    'doctor_name': 'Doctor name', 'summary': 'Summary', 'details': 'Details'
+}
+
+# function to build the query fetching the details of a patient along with one page of their timeline, newest first
+# (the prescriptions and medical tests are read through the indexes on the patient id and the date and time, and the
+# page starts after a given event when paged); a patient without any events still gets one row, with empty events
+def timeline_query(paged):
+    return f"""
+        SELECT {', '.join(f'patient.{column}' for column in patient_titles)}, event.*
+        FROM patient_view AS patient
+        LEFT JOIN (
+            SELECT *
+            FROM (
+                SELECT COALESCE(date_time, '') AS date_time, 'Prescription' AS event, id AS record_id,
+                doctor_name, diagnosis AS summary, medicines AS details
+                FROM prescription_view
+                WHERE patient_id = :p_id
+                UNION ALL
+                SELECT test_date_time, 'Medical test', id, doctor_name, test_name, result_and_diagnosis
+                FROM medical_test_view
+                WHERE patient_id = :p_id
+                UNION ALL
+                SELECT date_of_registration || ' ' || substr(time_of_registration, 1, 5), 'Registration', id,
+                NULL, 'Registered as a patient', NULL
+                FROM patient_record
+                WHERE id = :p_id
+            )
+            {'WHERE (date_time, record_id) < (:before_date_time, :before_id)' if paged else ''}
+            ORDER BY date_time DESC, record_id DESC
+            LIMIT :limit
+        ) AS event
+        WHERE patient.id = :p_id
+        ORDER BY event.date_time DESC, event.record_id DESC;
+        """
+
+# function to fetch the details of a patient and one page of their timeline (prescriptions, medical tests and
+# registration, newest first) in a single query, starting after the given (date and time, record id) of an event;
+# returns a (details, events) tuple, or None if there is no such patient
+def fetch_timeline(patient_id, before = None, limit = pagination.page_size):
+    parameters = { 'p_id': patient_id, 'limit': limit }
+    if before is not None:
+        parameters['before_date_time'], parameters['before_id'] = before
+    with db.connection() as (conn, c):
+        c.execute(timeline_query(before is not None), parameters)
+        rows = c.fetchall()
+    if len(rows) == 0:
+        return None
+    split = len(patient_titles)
+    details = dict(zip(patient_titles, rows[0][:split]))
+    events = [row[split:] for row in rows if row[split + 2] is not None]      # skips the empty event (no record id) of the left join
+    return details, events
+
+# function to show the timeline of the given patient one page at a time
+def show_timeline(patient_id):
+    key = f'timeline_{patient_id}_page_starts'      # events after which each visited page starts (None for the first page)
+    if key not in st.session_state:
+        pagination.first_page(key)
+    size = st.selectbox('Events per page', pagination.page_size_options,
+                        index = pagination.page_size_options.index(pagination.page_size),
+                        key = 'timeline_page_size', on_change = pagination.first_page, args = (key,))
+    page_starts = st.session_state[key]
+    timeline = rendering.cached_call(fetch_timeline, patient_id, page_starts[-1], size + 1)     # one extra event tells if there is a next page
+    if timeline is None:
+        st.error('Invalid Patient ID')
+        return
+    st.success('Verified')
+    details, events = timeline
+    st.write('Here are the details of the patient:')
+    rendering.show_records([tuple(details.values())], patient_titles)
+    has_next_page = len(events) > size
+    events = events[:size]
+    st.write('Here is the timeline of', details['name'], '(newest first):')
+    rendering.show_records(events, event_titles)
+    previous_column, next_column = st.columns(2)
+    previous_column.button('Previous page', key = 'timeline_previous_page',
+                           disabled = len(page_starts) == 1,
+                           on_click = pagination.previous_page, args = (key,))
+    next_column.button('Next page', key = 'timeline_next_page',
+                       disabled = not has_next_page,
+                       on_click = pagination.next_page, args = (key, (events[-1][0], events[-1][2]) if events else None))
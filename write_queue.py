@@ -0,0 +1,131 @@
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+import config
+import database as db
+import instrumentation
+
+# whether the writes of all the sessions go through a single writer thread committing them in groups
+# (configurable through config.write_queue); otherwise each write is committed in a transaction of its own
+enabled = getattr(config, 'write_queue', True)
+
+# maximum number of writes committed together in one transaction (configurable through config.group_commit_size)
+group_commit_size = getattr(config, 'group_commit_size', 100)
+
+# number of milliseconds the writer waits for more writes before committing a group (configurable through
+# config.group_commit_wait); by default it doesn't wait, and groups are made of the writes queued during the previous
+# commit, so a single clerk sees no added latency while many clerks share each commit
+group_commit_wait = getattr(config, 'group_commit_wait', 0)
+
+# class implementing a queue of writes (functions taking a cursor) run by a single background thread, which commits
+# the writes waiting in the queue together in one transaction and then gives each caller its own result (or exception)
+class WriteQueue:
+
+    def __init__(self, size, wait):
+        self.size = size
+        self.wait = wait / 1000
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.writes = 0         # number of writes committed (or failed)
+        self.groups = 0         # number of transactions committed
+        self.largest = 0        # largest number of writes committed in one transaction
+        self.failures = 0       # number of writes that raised an exception (rolled back on their own)
+
+    # method to start the writer thread (if it isn't running yet)
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target = self.run, name = 'write_queue', daemon = True)
+                self.thread.start()
+
+    # method to queue a write (a function taking a cursor); returns a Future of its result, set once committed
+    # (its statements are attributed to the code that queued it, found before it is handed to the writer thread)
+    def submit(self, function):
+        future = Future()
+        if not enabled:
+            try:
+                with db.connection() as (conn, c):
+                    with conn:
+                        result = function(c)
+                future.set_result(result)
+            except Exception as exception:
+                future.set_exception(exception)
+            return future
+        site = instrumentation.calling_site(sys._getframe(1)) if instrumentation.enabled else None
+        self.start()
+        self.requests.put((function, future, site))
+        return future
+
+    # method to run a write and wait until it's committed, returning its result (or raising its exception)
+    def write(self, function):
+        return self.submit(function).result()
+
+    # method to take the next group of writes from the queue (waiting for the first one)
+    def next_group(self):
+        group = [self.requests.get()]
+        deadline = time.monotonic() + self.wait
+        while len(group) < self.size:
+            try:
+                timeout = deadline - time.monotonic()
+                group.append(self.requests.get(timeout = timeout) if timeout > 0 else self.requests.get_nowait())
+            except queue.Empty:
+                break
+        return group
+
+    # method to commit a group of writes in one transaction (each in a savepoint of its own, so that a write raising an
+    # exception, e.g. a duplicate Aadhar ID, is rolled back without affecting the others); returns the outcome of each
+    # write as a (result, exception) tuple
+    def commit(self, group):
+        outcomes = []
+        with db.connection() as (conn, c):
+            try:
+                c.execute('BEGIN IMMEDIATE;')       # takes the write lock (waiting for other processes) before writing
+                for function, future, site in group:
+                    c.execute('SAVEPOINT write;')
+                    try:
+                        with instrumentation.issued_by(site):
+                            outcomes.append((function(c), None))
+                        c.execute('RELEASE write;')
+                    except Exception as exception:
+                        c.execute('ROLLBACK TO write;')
+                        c.execute('RELEASE write;')
+                        outcomes.append((None, exception))
+                conn.commit()
+            except Exception as exception:
+                conn.rollback()
+                outcomes = [(None, exception)] * len(group)
+        return outcomes
+
+    # method run by the writer thread: commits the queued writes group by group
+    def run(self):
+        while True:
+            group = self.next_group()
+            try:
+                outcomes = self.commit(group)
+            except Exception as exception:        # e.g. the database couldn't be opened
+                outcomes = [(None, exception)] * len(group)
+            with self.lock:
+                self.writes += len(group)
+                self.groups += 1
+                self.largest = max(self.largest, len(group))
+                self.failures += sum(exception is not None for _, exception in outcomes)
+            # the callers only hear back once the connection is released (and the cached query results invalidated)
+            for (function, future, site), (result, exception) in zip(group, outcomes):
+                if exception is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(exception)
+
+    # method to get the usage counters of the queue
+    def stats(self):
+        with self.lock:
+            return {
+                'queued': self.requests.qsize(), 'writes': self.writes, 'groups': self.groups,
+                'mean_group': round(self.writes / self.groups, 2) if self.groups else 0.0,
+                'largest_group': self.largest, 'failures': self.failures
+            }
+
+writer = WriteQueue(group_commit_size, group_commit_wait)